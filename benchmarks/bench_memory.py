@@ -0,0 +1,187 @@
+"""
+Memory benchmark for the in-memory paper representation, no network needed.
+
+    python benchmarks/bench_memory.py
+    python benchmarks/bench_memory.py --papers 100000 --categories 3
+
+Synthetic papers are built with distinct title, abstract, author and
+translation strings, and with subject and date strings parsed into fresh
+objects per paper, as the listing parser produces them. The text itself is
+generated before measuring, so the numbers below are what each
+representation adds on top of the raw text:
+
+    dicts           a listing dict per paper, the format_paper copy queued for
+                    processing and the translated dict handed to the sinks
+    dicts+markdown  the same plus one rendered Markdown entry per assigned
+                    category, as IncrementalMarkdownWriter used to buffer them
+    paper           one url_tools.paper.Paper carrying the translation and the
+                    category bitmask, referenced from each category's pending list
+
+All three are measured with every paper alive at once, i.e. a run whose writer
+buffers the whole output, which is the upper bound of what a large run holds.
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'codes'))
+
+from url_tools.paper import Paper
+
+WORDS = ('agent', 'attention', 'benchmark', 'diffusion', 'efficient', 'graph', 'inference', 'language',
+         'learning', 'model', 'multimodal', 'neural', 'policy', 'reasoning', 'retrieval', 'robust',
+         'scalable', 'training', 'transformer', 'vision')
+SUBJECTS = ('Computation and Language (cs.CL)', 'Artificial Intelligence (cs.AI)',
+            'Machine Learning (cs.LG)', 'Computer Vision and Pattern Recognition (cs.CV)')
+LABELS = ('NLP', 'Agents', 'CV', 'RL', 'Theory', 'Systems')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Compare memory use of dict and Paper representations')
+    parser.add_argument('--papers', type=int, default=100000, help='Synthetic papers (default: 100000)')
+    parser.add_argument('--categories', type=int, default=2, help='Categories assigned per paper (default: 2)')
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args()
+
+
+def fresh(text):
+    """A new string object equal to text, like one sliced out of a parsed page"""
+    return ''.join(list(text))
+
+
+def synthetic_corpus(count, categories, seed):
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(count):
+        title = ' '.join(rng.choices(WORDS, k=8)).capitalize() + f' {i}'
+        abstract = ' '.join(rng.choices(WORDS, k=150)).capitalize() + '.'
+        subjects = rng.sample(SUBJECTS, 2)
+        corpus.append({
+            'id': f"2410.{i:05d}",
+            'title': title,
+            'authors': [f"Author {i}-{k}" for k in range(rng.randint(2, 6))],
+            'abstract': abstract,
+            'primary_subject': subjects[0],
+            'subjects': subjects[0] + '; ' + subjects[1],
+            'title_zh': f"【译】{title}",
+            'abstract_zh': f"【译】{abstract}",
+            'labels': rng.sample(LABELS, categories)
+        })
+    return corpus
+
+
+def build_dicts(corpus, base_url='https://arxiv.org', render=True):
+    dedup, translated, pending = {}, [], {}
+    for item in corpus:
+        paper_id = item['id']
+        listing = {
+            'id': paper_id,
+            'title': item['title'],
+            'authors': list(item['authors']),
+            'abstract': item['abstract'],
+            'primary_subject': fresh(item['primary_subject']),
+            'subjects': fresh(item['subjects']),
+            'pdf_url': f"{base_url}/pdf/{paper_id}",
+            'arxiv_url': f"{base_url}/abs/{paper_id}",
+            'date': fresh('2026-10-17')
+        }
+        dedup[paper_id] = listing
+        queued = {
+            'id': listing['id'],
+            'title': listing['title'],
+            'abstract': listing.get('abstract') or '',
+            'url': listing['arxiv_url'],
+            'primary_subject': listing.get('primary_subject', 'N/A'),
+            'authors': listing.get('authors', []),
+            'subjects': listing.get('subjects', ''),
+            'pdf_url': listing.get('pdf_url', ''),
+            'date': listing.get('date', '')
+        }
+        result = {
+            'title': item['title_zh'],
+            'abstract': item['abstract_zh'],
+            'url': queued['url'],
+            'id': queued['id'],
+            'original_title': queued['title'],
+            'original_abstract': queued['abstract'],
+            'authors': queued['authors'],
+            'primary_subject': queued['primary_subject'],
+            'subjects': queued['subjects'],
+            'pdf_url': queued['pdf_url'],
+            'date': queued['date']
+        }
+        translated.append((queued, result, list(item['labels'])))
+        if not render:
+            continue
+        for label in item['labels']:
+            lines = [f"- [{result['title']}]({result['url']})", f"  > {result['abstract']}"]
+            pending.setdefault(label, []).append("\n".join(lines) + "\n\n")
+    return dedup, translated, pending
+
+
+def build_papers(corpus, base_url='https://arxiv.org'):
+    dedup, pending = {}, {}
+    for item in corpus:
+        paper_id = item['id']
+        paper = Paper(
+            id=paper_id,
+            title=item['title'],
+            authors=item['authors'],
+            abstract=item['abstract'],
+            primary_subject=fresh(item['primary_subject']),
+            subjects=fresh(item['subjects']),
+            pdf_url=f"{base_url}/pdf/{paper_id}",
+            arxiv_url=f"{base_url}/abs/{paper_id}",
+            date=fresh('2026-10-17')
+        )
+        dedup[paper_id] = paper
+        paper.title_zh = item['title_zh']
+        paper.abstract_zh = item['abstract_zh']
+        paper.categories = item['labels']
+        for label in item['labels']:
+            pending.setdefault(label, []).append(paper)
+    return dedup, pending
+
+
+def measure(build, corpus):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build(corpus)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    gc.collect()
+    return current, peak, elapsed
+
+
+def main():
+    args = parse_args()
+    corpus = synthetic_corpus(args.papers, args.categories, args.seed)
+    text = sum(len(item['title']) + len(item['abstract']) + len(item['title_zh']) + len(item['abstract_zh'])
+               for item in corpus)
+    print(f"{args.papers} papers, {args.categories} categories each, {text / 2 ** 20:.1f}M characters of text "
+          f"(not counted below)")
+    print(f"{'representation':16s} {'retained MB':>12s} {'peak MB':>9s} {'bytes/paper':>12s} {'build s':>8s}")
+    results = {}
+    builds = (
+        ('dicts', lambda corpus: build_dicts(corpus, render=False)),
+        ('dicts+markdown', build_dicts),
+        ('paper', build_papers)
+    )
+    for name, build in builds:
+        current, peak, elapsed = measure(build, corpus)
+        results[name] = current
+        print(f"{name:16s} {current / 2 ** 20:12.1f} {peak / 2 ** 20:9.1f} {current / args.papers:12.0f} "
+              f"{elapsed:8.2f}")
+    print(f"\nPaper retains {1 - results['paper'] / results['dicts']:.0%} less than the dicts, "
+          f"{1 - results['paper'] / results['dicts+markdown']:.0%} less with buffered Markdown")
+
+
+if __name__ == '__main__':
+    main()
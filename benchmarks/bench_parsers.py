@@ -0,0 +1,77 @@
+"""
+Parse time per listing page for each parser backend in url_tools.parsers.
+
+    python benchmarks/bench_parsers.py
+    python benchmarks/bench_parsers.py --fixture saved/cs.CL.html --repeat 10
+
+Without --fixture a synthetic 2000-entry listing is generated. Every backend
+must produce the same dicts as the BeautifulSoup reference or the run fails.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'codes'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fixtures import abstract_html, listing_html, paper_ids
+from url_tools.parsers import PARSERS, lxml
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark listing/abstract parser backends')
+    parser.add_argument('--fixture', action='append', default=[],
+                        help='Saved listing HTML file (repeatable); defaults to a synthetic page')
+    parser.add_argument('--entries', type=int, default=2000,
+                        help='Entries in the synthetic listing (default: 2000)')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Timed repetitions per backend (default: 5)')
+    return parser.parse_args()
+
+
+def best_of(repeat, func, *args):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    args = parse_args()
+    if args.fixture:
+        pages = []
+        for path in args.fixture:
+            with open(path, 'r', encoding='utf-8') as f:
+                pages.append((os.path.basename(path), f.read()))
+    else:
+        pages = [(f'synthetic cs.CL ({args.entries} entries)', listing_html('cs.CL', args.entries))]
+    abstract_pages = [abstract_html(paper_id) for paper_id in paper_ids('cs.CL', 200)]
+
+    backends = {name: cls() for name, cls in PARSERS.items() if name != 'lxml' or lxml is not None}
+    reference = backends['bs4']
+
+    for label, page in pages:
+        print(f"\n{label}: {len(page) / 1e6:.1f} MB")
+        expected = reference.parse_listing(page, 'https://arxiv.org')
+        for name, backend in backends.items():
+            seconds, papers = best_of(args.repeat, backend.parse_listing, page, 'https://arxiv.org')
+            status = 'ok' if papers == expected else 'MISMATCH'
+            print(f"  listing  {name:5s} {seconds * 1000:9.1f} ms  {len(papers)} papers  [{status}]")
+            if papers != expected:
+                sys.exit(1)
+
+    print(f"\nabstract pages: {len(abstract_pages)}")
+    expected = [reference.parse_abstract(page) for page in abstract_pages]
+    for name, backend in backends.items():
+        seconds, abstracts = best_of(args.repeat, lambda: [backend.parse_abstract(page) for page in abstract_pages])
+        status = 'ok' if abstracts == expected else 'MISMATCH'
+        print(f"  abstract {name:5s} {seconds * 1000 / len(abstract_pages):9.3f} ms/page  [{status}]")
+        if abstracts != expected:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""
+End-to-end benchmark of main() against stub_server.py: no network, no API key.
+
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --categories cs.CL cs.AI --entries 1000 --llm-latency 0.5
+    python benchmarks/bench_pipeline.py --llm-error-rate 0.05 --llm-throttle-rate 0.1
+    python benchmarks/bench_pipeline.py --recordings recordings --runs 2
+    python benchmarks/bench_pipeline.py --backfill-days 28 --per-day 100
+
+The run uses configs/config.yaml with arXiv and Ark pointed at the stub and
+every cache, checkpoint and output file moved into a scratch directory. With
+--runs N the scratch directory is kept between runs, so later runs show the
+effect of the paper, response and HTTP caches (listing_304 in the stub
+request counts). Each run prints wall time, throughput and the per-stage
+latencies from the run report written by monitoring.Metrics.
+"""
+import argparse
+import datetime
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import yaml
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'codes'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_server import StubConfig, StubServer
+import main as pipeline_main
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark the full pipeline against local arXiv and Ark stubs')
+    parser.add_argument('--config', default=os.path.join(ROOT, 'configs', 'config.yaml'),
+                        help='Base configuration (default: configs/config.yaml)')
+    parser.add_argument('--categories', nargs='+', default=['cs.CL', 'cs.AI'])
+    parser.add_argument('--entries', type=int, default=500, help='Entries per synthetic listing (default: 500)')
+    parser.add_argument('--backfill-days', type=int, default=0,
+                        help='Run a backfill of this many days ending today instead of reading /recent')
+    parser.add_argument('--per-day', type=int, default=50,
+                        help='Papers per category and day in backfill searches (default: 50)')
+    parser.add_argument('--recordings', help='Directory of recorded pages (see record_pages.py)')
+    parser.add_argument('--runs', type=int, default=1, help='Runs sharing one scratch directory (default: 1)')
+    parser.add_argument('--arxiv-latency', type=float, default=0.0, help='Seconds per arXiv response')
+    parser.add_argument('--arxiv-rate', type=float, default=1000.0,
+                        help='Client-side arXiv rate limit in requests/s (default: 1000, i.e. unthrottled)')
+    parser.add_argument('--export-miss-rate', type=float, default=0.0,
+                        help='Fraction of IDs missing from the export API, fetched from abstract pages instead')
+    parser.add_argument('--llm-latency', type=float, default=0.2, help='Mean seconds per chat completion')
+    parser.add_argument('--llm-jitter', type=float, default=0.1)
+    parser.add_argument('--llm-error-rate', type=float, default=0.0, help='Fraction of HTTP 500 responses')
+    parser.add_argument('--llm-throttle-rate', type=float, default=0.0, help='Fraction of HTTP 429 responses')
+    parser.add_argument('--keep', action='store_true', help='Keep the scratch directory and print its path')
+    return parser.parse_args()
+
+
+def bench_config(base_config, args, server, scratch):
+    config = json.loads(json.dumps(base_config))
+    config['arxiv'].update({
+        'categories': args.categories,
+        'base_url': server.url,
+        'export_url': f"{server.url}/api/query",
+        'rate_limit': args.arxiv_rate,
+        'export_rate_limit': args.arxiv_rate,
+        'burst': 8
+    })
+    config['api'].update({'base_url': f"{server.url}/api/v3", 'use_ai': True})
+    config['api']['max_run_tokens'] = None
+    config.setdefault('pre_classifier', {})['label_path'] = os.path.join(scratch, 'labels.jsonl')
+    config['checkpoint'] = {'path': os.path.join(scratch, 'checkpoint.jsonl')}
+    config.setdefault('cache', {}).update({
+        'paper_db': os.path.join(scratch, 'papers.sqlite'),
+        'response_db': os.path.join(scratch, 'responses.sqlite'),
+        'http_dir': os.path.join(scratch, 'http')
+    })
+    config['metrics'] = {'report_path': os.path.join(scratch, 'run_report.json'), 'quiet': True}
+    config['output'].update({
+        'file_path': os.path.join(scratch, 'output.md'),
+        'jsonl_path': os.path.join(scratch, 'output.jsonl'),
+        'parquet_dir': os.path.join(scratch, 'parquet')
+    })
+    return config
+
+
+def run_once(config_path, backfill_days):
+    argv = sys.argv
+    sys.argv = ['main.py', '--config', config_path, '--quiet']
+    if backfill_days:
+        start = datetime.date.today() - datetime.timedelta(days=backfill_days - 1)
+        sys.argv += ['--backfill-from', start.isoformat()]
+    start = time.perf_counter()
+    try:
+        pipeline_main.main()
+    except SystemExit as e:
+        if e.code:
+            print(f"main() exited with status {e.code}")
+    finally:
+        sys.argv = argv
+    return time.perf_counter() - start
+
+
+def print_report(report, wall, counts):
+    run = report['run']
+    metrics = report['metrics']
+    papers = run['papers']
+    print(f"\n== papers {papers}, wall {wall:.2f}s, {papers / wall if wall else 0:.1f} papers/s, "
+          f"completed {run['completed']}")
+    print(f"   stub requests: {dict(sorted(counts.items()))}")
+    tokens = report['tokens']
+    print(f"   LLM: {tokens['requests']} requests, {tokens['cached']} cached, "
+          f"{tokens['prompt_tokens']} prompt + {tokens['completion_tokens']} completion tokens; "
+          f"API retries {report['api']['retries']}, failures {report['api']['failures']}")
+    print(f"   counters: {json.dumps(metrics['counters'], sort_keys=True)}")
+    print(f"   {'timing':32s} {'count':>6s} {'total s':>9s} {'p50 ms':>9s} {'p90 ms':>9s} {'p99 ms':>9s} {'max ms':>9s}")
+    for name, summary in sorted(metrics['timings'].items()):
+        print(f"   {name:32s} {summary['count']:6d} {summary['sum']:9.2f} {summary['p50'] * 1000:9.1f} "
+              f"{summary['p90'] * 1000:9.1f} {summary['p99'] * 1000:9.1f} {summary['max'] * 1000:9.1f}")
+    for name, gauge in sorted(metrics['gauges'].items()):
+        print(f"   {name:32s} last {gauge['last']:g}, max {gauge['max']:g}")
+
+
+def main():
+    args = parse_args()
+    with open(args.config, 'r', encoding='utf-8') as f:
+        base_config = yaml.safe_load(f)
+    server = StubServer(StubConfig(
+        categories=base_config['categories'],
+        entries=args.entries,
+        per_day=args.per_day,
+        recordings=args.recordings,
+        arxiv_latency=args.arxiv_latency,
+        export_miss_rate=args.export_miss_rate,
+        llm_latency=args.llm_latency,
+        llm_jitter=args.llm_jitter,
+        llm_error_rate=args.llm_error_rate,
+        llm_throttle_rate=args.llm_throttle_rate
+    )).start()
+    scratch = tempfile.mkdtemp(prefix='arxiv-bench-')
+    os.environ['ARK_API_KEY'] = 'stub'
+    try:
+        config_path = os.path.join(scratch, 'config.yaml')
+        with open(config_path, 'w', encoding='utf-8') as f:
+            yaml.safe_dump(bench_config(base_config, args, server, scratch), f, allow_unicode=True)
+        for run in range(1, args.runs + 1):
+            print(f"\n--- run {run}/{args.runs}")
+            server.counts.clear()
+            wall = run_once(config_path, args.backfill_days)
+            with open(os.path.join(scratch, 'run_report.json'), 'r', encoding='utf-8') as f:
+                print_report(json.load(f), wall, server.counts)
+    finally:
+        server.stop()
+        if args.keep:
+            print(f"\nScratch directory: {scratch}")
+        else:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+Synthetic arXiv pages that follow the markup of the live site.
+
+Used by the benchmarks in place of recorded pages so that they run offline and
+produce the same numbers on every machine.
+"""
+from datetime import date, timedelta
+from html import escape
+from typing import Dict, List, Optional
+import random
+
+SUBJECT_NAMES = {
+    'cs.AI': 'Artificial Intelligence',
+    'cs.CL': 'Computation and Language',
+    'cs.CV': 'Computer Vision and Pattern Recognition',
+    'cs.LG': 'Machine Learning',
+    'cs.IR': 'Information Retrieval',
+    'cs.RO': 'Robotics',
+}
+
+WORDS = (
+    "language model vision transformer agent retrieval benchmark reasoning graph "
+    "diffusion alignment efficient scalable robust neural dataset evaluation learning "
+    "multimodal policy inference training attention representation generation"
+).split()
+
+
+def paper_ids(category: str, count: int, offset: int = 0) -> List[str]:
+    """Deterministic arXiv IDs; different categories overlap to mimic cross-listing."""
+    base = 10000 + sum(map(ord, category)) * 7 % 500
+    return [f"2410.{base + offset + i:05d}" for i in range(count)]
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def title_for(paper_id: str) -> str:
+    return _sentence(random.Random(f"title-{paper_id}"), 8)
+
+
+def abstract_for(paper_id: str) -> str:
+    rng = random.Random(f"abstract-{paper_id}")
+    return '. '.join(_sentence(rng, 18) for _ in range(6)) + '.'
+
+
+def listing_html(category: str, count: int = 2000, offset: int = 0) -> str:
+    """Listing page as served by /list/<category>/recent?show=2000."""
+    name = SUBJECT_NAMES.get(category, category)
+    secondary = [c for c in SUBJECT_NAMES if c != category]
+    entries = []
+    for index, paper_id in enumerate(paper_ids(category, count, offset), start=1):
+        rng = random.Random(paper_id)
+        authors = ', '.join(
+            f'<a href="https://arxiv.org/a/author_{rng.randint(1, 9999)}">{escape(_sentence(rng, 2).title())}</a>'
+            for _ in range(rng.randint(1, 6))
+        )
+        cross = '; '.join(f"{SUBJECT_NAMES[c]} ({c})" for c in rng.sample(secondary, rng.randint(0, 2)))
+        entries.append(f"""  <dt>
+    <a name='item{index}'>[{index}]</a>
+    <a href ="/abs/{paper_id}" title="Abstract" id="{paper_id}">
+      arXiv:{paper_id}
+    </a>
+    [<a href="/pdf/{paper_id}" title="Download PDF" id="pdf-{paper_id}" aria-labelledby="pdf-{paper_id}">pdf</a>, <a href="/format/{paper_id}" title="Other formats" id="oth-{paper_id}" aria-labelledby="oth-{paper_id}">other</a>]
+  </dt>
+  <dd>
+    <div class='meta'>
+      <div class='list-title mathjax'><span class='descriptor'>Title:</span>
+        {escape(title_for(paper_id))}
+      </div>
+      <div class='list-authors'>{authors}</div>
+      <div class='list-comments mathjax'><span class='descriptor'>Comments:</span>
+        {rng.randint(4, 40)} pages, {rng.randint(1, 12)} figures
+      </div>
+      <div class='list-subjects'><span class='descriptor'>Subjects:</span>
+        <span class="primary-subject">{name} ({category})</span>{'; ' + cross if cross else ''}
+      </div>
+    </div>
+  </dd>""")
+    body = '\n'.join(entries)
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head><title>{name}</title><meta charset="utf-8"></head>
+<body>
+<div id="header"><h1>arXiv.org</h1></div>
+<div id="content">
+<div id='dlpage'>
+<h1>{name}</h1>
+<dl id='articles'>
+<h3>Fri, 18 Oct 2024 (showing {count} of {count} entries )</h3>
+{body}
+</dl>
+</div>
+</div>
+</body>
+</html>
+"""
+
+
+def abstract_html(paper_id: str) -> str:
+    """Abstract page as served by /abs/<id>."""
+    abstract = escape(abstract_for(paper_id), quote=True)
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<title>[{paper_id}] {escape(title_for(paper_id))}</title>
+<meta name="citation_title" content="{escape(title_for(paper_id), quote=True)}" />
+<meta name="citation_arxiv_id" content="{paper_id}" />
+<meta name="citation_abstract" content="{abstract}" />
+</head>
+<body>
+<div id="abs">
+<h1 class="title mathjax"><span class="descriptor">Title:</span>{escape(title_for(paper_id))}</h1>
+<blockquote class="abstract mathjax"><span class="descriptor">Abstract:</span>{abstract}</blockquote>
+</div>
+</body>
+</html>
+"""
+
+
+def atom_feed(ids: List[str], abstracts: Optional[Dict[str, str]] = None) -> str:
+    """export.arxiv.org/api/query?id_list=... response; abstracts overrides the synthetic text."""
+    abstracts = abstracts or {}
+    entries = '\n'.join(f"""  <entry>
+    <id>http://arxiv.org/abs/{paper_id}v1</id>
+    <title>{escape(title_for(paper_id))}</title>
+    <summary>  {escape(abstracts.get(paper_id) or abstract_for(paper_id))}
+</summary>
+  </entry>""" for paper_id in ids)
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <title type="html">ArXiv Query</title>
+{entries}
+</feed>
+"""
+
+
+def submitted_ids(category: str, day: date, count: int) -> List[str]:
+    """IDs submitted to a category on one day; neighbouring categories overlap like cross-lists."""
+    shift = sum(map(ord, category)) % max(1, count // 2)
+    return [f"{day:%y%m}.{day.day * 500 + shift + i:05d}" for i in range(count)]
+
+
+def search_feed(category: str, start: date, end: date, offset: int, limit: int, per_day: int) -> str:
+    """export API response to search_query=cat:<category> AND submittedDate:[start TO end]."""
+    ids = []
+    day = start
+    while day <= end:
+        ids.extend((paper_id, day) for paper_id in submitted_ids(category, day, per_day))
+        day += timedelta(days=1)
+    secondary = [c for c in SUBJECT_NAMES if c != category]
+    entries = []
+    for paper_id, day in ids[offset:offset + limit]:
+        rng = random.Random(paper_id)
+        categories = [category] + rng.sample(secondary, rng.randint(0, 2))
+        authors = ''.join(
+            f"<author><name>{escape(_sentence(rng, 2).title())}</name></author>" for _ in range(rng.randint(1, 6))
+        )
+        terms = ''.join(f'<category term="{c}" scheme="http://arxiv.org/schemas/atom"/>' for c in categories)
+        entries.append(f"""  <entry>
+    <id>http://arxiv.org/abs/{paper_id}v1</id>
+    <published>{day.isoformat()}T12:00:00Z</published>
+    <title>{escape(title_for(paper_id))}</title>
+    <summary>  {escape(abstract_for(paper_id))}
+</summary>
+    {authors}
+    <link href="http://arxiv.org/pdf/{paper_id}v1" rel="related" type="application/pdf" title="pdf"/>
+    <arxiv:primary_category xmlns:arxiv="http://arxiv.org/schemas/atom" term="{category}" scheme="http://arxiv.org/schemas/atom"/>
+    {terms}
+  </entry>""")
+    body = '\n'.join(entries)
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">
+  <title type="html">ArXiv Query</title>
+  <opensearch:totalResults>{len(ids)}</opensearch:totalResults>
+  <opensearch:startIndex>{offset}</opensearch:startIndex>
+  <opensearch:itemsPerPage>{limit}</opensearch:itemsPerPage>
+{body}
+</feed>
+"""
@@ -0,0 +1,59 @@
+"""
+Save live arXiv pages for replay by stub_server.py.
+
+    python benchmarks/record_pages.py --category cs.CL --category cs.AI --abstracts 50 --out recordings
+
+Layout of the output directory:
+
+    <out>/list/<category>.html    /list/<category>/recent?skip=0&show=2000
+    <out>/abs/<id>.html           /abs/<id>, '/' in old-style IDs replaced by '_'
+
+Requests go through the project's rate-limited client (1 request/second by
+default), so recording stays within arXiv's crawling policy.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'codes'))
+
+from url_tools.http_client import ArxivHttpClient
+from url_tools.parsers import get_parser
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Record arXiv listing and abstract pages for offline benchmarks')
+    parser.add_argument('--category', action='append', required=True, help='arXiv category (repeatable)')
+    parser.add_argument('--abstracts', type=int, default=20,
+                        help='Abstract pages to record per category (default: 20)')
+    parser.add_argument('--out', default='recordings', help='Output directory (default: recordings)')
+    parser.add_argument('--base-url', default='https://arxiv.org')
+    parser.add_argument('--rate', type=float, default=1.0, help='Requests per second (default: 1)')
+    return parser.parse_args()
+
+
+def save(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def main():
+    args = parse_args()
+    client = ArxivHttpClient(rate=args.rate, headers={'User-Agent': 'arxiv-daily-benchmark-recorder'})
+    parser = get_parser()
+    for category in args.category:
+        response = client.get(f"{args.base_url}/list/{category}/recent?skip=0&show=2000")
+        response.raise_for_status()
+        save(os.path.join(args.out, 'list', f'{category}.html'), response.text)
+        entries = parser.parse_listing(response.text, args.base_url)
+        print(f"{category}: {len(entries)} entries")
+        for entry in entries[:args.abstracts]:
+            response = client.get(f"{args.base_url}/abs/{entry['id']}")
+            response.raise_for_status()
+            save(os.path.join(args.out, 'abs', f"{entry['id'].replace('/', '_')}.html"), response.text)
+        print(f"{category}: recorded {min(args.abstracts, len(entries))} abstract pages")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,321 @@
+"""
+Local stand-ins for arXiv and the Ark chat completion API.
+
+A single threaded HTTP server answers:
+
+    GET  /list/<category>/recent     listing page (ETag, Last-Modified, 304)
+    GET  /abs/<id>                   abstract page (ETag, Last-Modified, 304)
+    GET  /api/query?id_list=...      export API Atom feed
+    GET  /api/query?search_query=... export API category/date search (backfill)
+    POST /api/v3/chat/completions    OpenAI-compatible chat completion
+
+Pages come from a recordings directory when one is given (see
+record_pages.py for the layout) and from fixtures.py otherwise. Latency and
+error rates are configurable so retry, backoff and concurrency changes can be
+measured without network access or API keys.
+
+    python benchmarks/stub_server.py --port 8765 --llm-latency 0.5
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+import argparse
+import collections
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'codes'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fixtures import abstract_for, abstract_html, atom_feed, listing_html, search_feed
+from datetime import date
+from email.utils import formatdate
+from url_tools.parsers import get_parser
+
+CHAT_PATH = '/api/v3/chat/completions'
+SEARCH_PATTERN = re.compile(r'cat:(\S+) AND submittedDate:\[(\d{8})\d{4} TO (\d{8})\d{4}\]')
+
+
+class StubConfig:
+    def __init__(
+        self,
+        categories: Optional[List[str]] = None,
+        entries: int = 500,
+        per_day: int = 50,
+        recordings: Optional[str] = None,
+        arxiv_latency: float = 0.0,
+        export_miss_rate: float = 0.0,
+        llm_latency: float = 0.2,
+        llm_jitter: float = 0.1,
+        llm_error_rate: float = 0.0,
+        llm_throttle_rate: float = 0.0,
+        seed: int = 0
+    ):
+        """
+        Args:
+            categories: labels the fake classifier answers with
+            entries: entries per synthetic listing page
+            per_day: papers per category and day returned by backfill searches
+            recordings: directory with recorded pages, see record_pages.py
+            arxiv_latency: seconds added to every arXiv response
+            export_miss_rate: fraction of IDs the export API leaves out, forcing abstract page fetches
+            llm_latency: mean seconds per chat completion
+            llm_jitter: uniform +/- jitter around llm_latency
+            llm_error_rate: fraction of chat completions answered with HTTP 500
+            llm_throttle_rate: fraction of chat completions answered with HTTP 429
+            seed: seed for latency and error draws
+        """
+        self.categories = categories or ['AI', 'NLP', 'CV', 'others']
+        self.entries = entries
+        self.per_day = per_day
+        self.recordings = recordings
+        self.arxiv_latency = arxiv_latency
+        self.export_miss_rate = export_miss_rate
+        self.llm_latency = llm_latency
+        self.llm_jitter = llm_jitter
+        self.llm_error_rate = llm_error_rate
+        self.llm_throttle_rate = llm_throttle_rate
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+
+    def draw(self) -> float:
+        with self.rng_lock:
+            return self.rng.random()
+
+
+def _stable_fraction(text: str) -> float:
+    return int(hashlib.md5(text.encode()).hexdigest()[:8], 16) / 0xFFFFFFFF
+
+
+class PageSource:
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self.parser = get_parser()
+        self._abstracts: Dict[str, str] = {}
+
+    def _recorded(self, *parts: str) -> Optional[str]:
+        if not self.config.recordings:
+            return None
+        path = os.path.join(self.config.recordings, *parts)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def listing(self, category: str) -> str:
+        return self._recorded('list', f'{category}.html') or listing_html(category, self.config.entries)
+
+    def abstract_page(self, paper_id: str) -> str:
+        return self._recorded('abs', f"{paper_id.replace('/', '_')}.html") or abstract_html(paper_id)
+
+    def abstract(self, paper_id: str) -> str:
+        if paper_id not in self._abstracts:
+            page = self._recorded('abs', f"{paper_id.replace('/', '_')}.html")
+            self._abstracts[paper_id] = (page and self.parser.parse_abstract(page)) or abstract_for(paper_id)
+        return self._abstracts[paper_id]
+
+    def feed(self, paper_ids: List[str]) -> str:
+        found = [
+            paper_id for paper_id in paper_ids
+            if _stable_fraction(paper_id) >= self.config.export_miss_rate
+        ]
+        if not self.config.recordings:
+            return atom_feed(found)
+        # Recorded papers keep their real abstracts in the feed
+        return atom_feed(found, {paper_id: self.abstract(paper_id) for paper_id in found})
+
+
+def label_for(key: str, categories: List[str]) -> List[str]:
+    return [categories[int(_stable_fraction(key) * len(categories)) % len(categories)]]
+
+
+def chat_content(messages: List[Dict[str, str]], categories: List[str]) -> str:
+    """Answer the prompts built by BytedanceTranslator and BytedanceClassifier in the expected format."""
+    system = messages[0]['content']
+    user = messages[-1]['content']
+    translate = '翻译' in system
+    try:
+        items = json.loads(user)
+    except json.JSONDecodeError:
+        items = None
+    if isinstance(items, list):
+        if translate:
+            return json.dumps({
+                item['id']: {'title': f"【译】{item['title']}", 'abstract': f"【译】{item['abstract']}"}
+                for item in items
+            }, ensure_ascii=False)
+        return json.dumps({item['id']: label_for(item['id'], categories) for item in items}, ensure_ascii=False)
+    if translate:
+        return f"【译】{user}"
+    return json.dumps(label_for(user, categories), ensure_ascii=False)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: str, content_type: str, headers: Optional[Dict[str, str]] = None) -> None:
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_page(self, route: str, body: str) -> None:
+        """Serve an HTML page with validators, answering 304 to a matching If-None-Match"""
+        etag = '"' + hashlib.md5(body.encode('utf-8')).hexdigest() + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self.server.count(f'{route}_304')
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.server.count(route)
+        self._send(200, body, 'text/html; charset=utf-8', {
+            'ETag': etag,
+            'Last-Modified': self.server.last_modified
+        })
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        parts = url.path.strip('/').split('/')
+        if server.config.arxiv_latency:
+            time.sleep(server.config.arxiv_latency)
+        if len(parts) == 3 and parts[0] == 'list':
+            self._send_page('listing', server.pages.listing(parts[1]))
+        elif parts[0] == 'abs' and len(parts) >= 2:
+            self._send_page('abstract_page', server.pages.abstract_page('/'.join(parts[1:])))
+        elif url.path == '/api/query' and 'search_query' in parse_qs(url.query):
+            server.count('export_search')
+            query = parse_qs(url.query)
+            match = SEARCH_PATTERN.match(query['search_query'][0])
+            if not match:
+                self._send(400, 'unsupported query', 'text/plain')
+                return
+            start, end = (date(int(d[:4]), int(d[4:6]), int(d[6:])) for d in match.group(2, 3))
+            self._send(200, search_feed(
+                match.group(1), start, end,
+                int(query.get('start', ['0'])[0]), int(query.get('max_results', ['10'])[0]), server.config.per_day
+            ), 'application/atom+xml; charset=utf-8')
+        elif url.path == '/api/query':
+            server.count('export_api')
+            ids = [paper_id for paper_id in parse_qs(url.query).get('id_list', [''])[0].split(',') if paper_id]
+            self._send(200, server.pages.feed(ids), 'application/atom+xml; charset=utf-8')
+        else:
+            self._send(404, 'not found', 'text/plain')
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if urlparse(self.path).path != CHAT_PATH:
+            self._send(404, 'not found', 'text/plain')
+            return
+        config = server.config
+        delay = config.llm_latency + (config.draw() * 2 - 1) * config.llm_jitter
+        time.sleep(max(0.0, delay))
+        draw = config.draw()
+        if draw < config.llm_throttle_rate:
+            server.count('llm_429')
+            error = {'error': {'code': 'RateLimitExceeded', 'message': 'stub throttled', 'type': 'TooManyRequests'}}
+            self._send(429, json.dumps(error), 'application/json', {'Retry-After': '0'})
+            return
+        if draw < config.llm_throttle_rate + config.llm_error_rate:
+            server.count('llm_500')
+            error = {'error': {'code': 'InternalServiceError', 'message': 'stub failure', 'type': 'InternalError'}}
+            self._send(500, json.dumps(error), 'application/json')
+            return
+
+        request = json.loads(body)
+        content = chat_content(request['messages'], config.categories)
+        prompt_tokens = sum(len(message['content']) for message in request['messages']) // 4
+        server.count('llm_ok')
+        self._send(200, json.dumps({
+            'id': f"stub-{time.monotonic_ns()}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'stub'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop'
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': len(content) // 4,
+                'total_tokens': prompt_tokens + len(content) // 4
+            }
+        }, ensure_ascii=False), 'application/json')
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, config: StubConfig, port: int = 0):
+        super().__init__(('127.0.0.1', port), StubHandler)
+        self.config = config
+        self.pages = PageSource(config)
+        self.counts = collections.Counter()
+        # pages are generated deterministically, so they last changed when the server started
+        self.last_modified = formatdate(usegmt=True)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def count(self, route: str) -> None:
+        with self._lock:
+            self.counts[route] += 1
+
+    def start(self) -> 'StubServer':
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve stub arXiv pages and a fake Ark chat completion API')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--recordings', help='Directory of recorded pages (see record_pages.py)')
+    parser.add_argument('--entries', type=int, default=500, help='Entries per synthetic listing')
+    parser.add_argument('--llm-latency', type=float, default=0.2)
+    parser.add_argument('--llm-jitter', type=float, default=0.1)
+    parser.add_argument('--llm-error-rate', type=float, default=0.0)
+    parser.add_argument('--llm-throttle-rate', type=float, default=0.0)
+    args = parser.parse_args()
+    server = StubServer(StubConfig(
+        entries=args.entries,
+        recordings=args.recordings,
+        llm_latency=args.llm_latency,
+        llm_jitter=args.llm_jitter,
+        llm_error_rate=args.llm_error_rate,
+        llm_throttle_rate=args.llm_throttle_rate
+    ), args.port)
+    print(f"arXiv:  base_url {server.url}, export_url {server.url}/api/query")
+    print(f"Ark:    base_url {server.url}/api/v3")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,11 @@
-from volcenginesdkarkruntime import Ark
-from typing import List, Dict, Any, Optional
+from volcenginesdkarkruntime import AsyncArk
+from typing import List, Dict, Any, Callable, Optional, Tuple
+from bytedance_ai_tools.response_cache import ResponseCache
+from bytedance_ai_tools.rate_control import ApiController
+from bytedance_ai_tools.token_budget import TokenBudgetExceeded, TokenUsage, estimate_message_tokens
+from monitoring.metrics import Metrics
 import json
+import time
 
 class ByteDanceAIClient:
     def __init__(
@@ -8,7 +13,11 @@ class ByteDanceAIClient:
         use_ai: bool = True, 
         base_url: Optional[str] = None,
         model_id: Optional[str] = None,
-        default_system_prompt: Optional[str] = None
+        default_system_prompt: Optional[str] = None,
+        response_cache: Optional[ResponseCache] = None,
+        controller: Optional[ApiController] = None,
+        token_usage: Optional[TokenUsage] = None,
+        metrics: Optional[Metrics] = None
     ):
         """
         初始化ByteDance AI客户端
@@ -18,11 +27,24 @@ class ByteDanceAIClient:
             base_url: API基础URL
             model_id: 模型ID
             default_system_prompt: 默认的system prompt
+            response_cache: 可选的响应缓存，命中时不再调用API
+            controller: 控制并发、重试、超时和熔断的ApiController，可在多个客户端间共享
+            token_usage: 可选的token用量统计和预算，可在多个客户端间共享
+            metrics: 可选的运行指标，记录API调用耗时（含重试）、调用数、缓存命中和失败数
         """
         self.use_ai = use_ai
+        self.controller = controller or ApiController()
         if use_ai:
-            self.client = Ark(base_url=base_url)
+            # 重试和超时由controller统一处理，关闭SDK自带的重试
+            self.client = AsyncArk(
+                base_url=base_url,
+                timeout=self.controller.request_timeout,
+                max_retries=0
+            )
             self.model_id = model_id
+        self.response_cache = response_cache
+        self.token_usage = token_usage
+        self.metrics = metrics or Metrics()
         self.default_system_prompt = default_system_prompt or "你是一个AI助手，请回答用户的问题。"
 
     def generate_messages(
@@ -49,12 +71,64 @@ class ByteDanceAIClient:
             
         return messages
 
+    def get_cached_items(self, system_prompt: str, contents: Dict[str, str]) -> Dict[str, Any]:
+        """
+        查找批量请求中各论文单独缓存的结果。批次的组成取决于论文到达的时机，
+        整条请求的缓存键在重跑时很难命中，按论文缓存则与分批方式无关
+
+        Args:
+            system_prompt: 批量请求的system prompt
+            contents: 论文id到只含该论文时的user内容
+
+        Returns:
+            命中缓存的 论文id -> 结果
+        """
+        if self.response_cache is None or not contents:
+            return {}
+        keys = {
+            paper_id: ResponseCache.make_item_key(self.model_id, system_prompt, content)
+            for paper_id, content in contents.items()
+        }
+        found = self.response_cache.get_many(keys.values())
+        results = {paper_id: json.loads(found[key]) for paper_id, key in keys.items() if key in found}
+        self.metrics.incr('llm_item_cache_hits', len(results))
+        return results
+
+    def put_cached_items(self, system_prompt: str, items: Dict[str, Tuple[str, Any]]) -> None:
+        """
+        按论文缓存批量请求的结果
+
+        Args:
+            system_prompt: 批量请求的system prompt
+            items: 论文id到 (只含该论文时的user内容, 可JSON序列化的结果)
+        """
+        if self.response_cache is None or not items:
+            return
+        self.response_cache.put_many({
+            ResponseCache.make_item_key(self.model_id, system_prompt, content): json.dumps(result, ensure_ascii=False)
+            for content, result in items.values()
+        })
+
+    @staticmethod
+    def _valid(response: str, parse_json: bool, validate: Callable[[Any], bool]) -> bool:
+        try:
+            return validate(json.loads(response) if parse_json else response)
+        except json.JSONDecodeError:
+            return False
+
+    async def close(self) -> None:
+        """关闭底层HTTP连接，需在发出请求的事件循环结束前调用"""
+        if self.use_ai:
+            await self.client.close()
+
     async def generate_response(
         self,
         user_content: str,
         system_prompt: Optional[str] = None,
         additional_messages: Optional[List[Dict[str, str]]] = None,
-        parse_json: bool = False
+        parse_json: bool = False,
+        raise_errors: bool = False,
+        validate: Optional[Callable[[Any], bool]] = None
     ) -> Any:
         """
         生成AI响应
@@ -64,6 +138,9 @@ class ByteDanceAIClient:
             system_prompt: 可选的系统提示词
             additional_messages: 额外的消息列表
             parse_json: 是否将响应解析为JSON
+            raise_errors: 为True时没有拿到响应（请求失败、熔断、超出token预算）抛出异常，
+                只有响应无法解析为JSON时返回None，调用方可据此区分两种情况
+            validate: 可选的结果校验函数，返回False的结果照常返回给调用方，但不写入缓存
 
         Returns:
             AI生成的响应或解析后的JSON
@@ -78,17 +155,54 @@ class ByteDanceAIClient:
                 additional_messages
             )
 
-            completion = self.client.chat.completions.create(
-                model=self.model_id,
-                messages=messages
-            )
+            cache_key = None
+            cached = None
+            if self.response_cache is not None:
+                cache_key = ResponseCache.make_key(self.model_id, messages)
+                cached = self.response_cache.get(cache_key)
+                if cached is not None and validate is not None and not self._valid(cached, parse_json, validate):
+                    # 旧版本缓存的无效响应，重新请求
+                    cached = None
 
-            result = completion.choices[0].message.content.strip()
+            if cached is not None:
+                result = cached
+                self.metrics.incr('llm_cache_hits')
+                if self.token_usage:
+                    self.token_usage.cached += 1
+            else:
+                estimate = estimate_message_tokens(messages)
+                if self.token_usage and not self.token_usage.reserve(estimate):
+                    if raise_errors:
+                        raise TokenBudgetExceeded(f"token budget of {self.token_usage.max_tokens} exhausted")
+                    return None
+                start = time.perf_counter()
+                try:
+                    completion = await self.controller.call(
+                        lambda: self.client.chat.completions.create(
+                            model=self.model_id,
+                            messages=messages
+                        )
+                    )
+                except BaseException:
+                    self.metrics.incr('llm_errors')
+                    if self.token_usage:
+                        self.token_usage.release(estimate)
+                    raise
+                finally:
+                    self.metrics.observe('llm_request_seconds', time.perf_counter() - start)
+                self.metrics.incr('llm_requests')
+                if self.token_usage:
+                    self.token_usage.record(estimate, getattr(completion, 'usage', None))
+                result = completion.choices[0].message.content.strip()
 
-            if parse_json:
-                return json.loads(result)
-            return result
+            # 解析并校验通过后再写缓存，避免缓存无效的响应
+            parsed = json.loads(result) if parse_json else result
+            if cache_key and cached is None and (validate is None or validate(parsed)):
+                self.response_cache.put(cache_key, result)
+            return parsed
 
         except Exception as e:
+            if raise_errors and not isinstance(e, json.JSONDecodeError):
+                raise
             print(f"Generation error: {e}")
             return None
@@ -1,44 +1,149 @@
 from bytedance_ai_tools.bytedance_ai_client import ByteDanceAIClient
-from concurrent.futures import ThreadPoolExecutor
+from bytedance_ai_tools.token_budget import compact_text, estimate_tokens, make_batches
+from typing import Dict, List, Optional, Set
 import asyncio
+import json
 
 def prompt_template(title, abstract):
     return f"Title: {title}\nAbstract: {abstract}"
 
 def system_prompt(classify_types):
-    return f"""你是一个论文分类助手。请将论文分类为以下类别的一个或多个：{classify_types}。
-    只需返回分类结果，不需要解释。
-    如果论文不属于上述任何一个类别，分类为Unknown。
-    返回格式为：["{classify_types[0]}","{classify_types[1]}"]"""
+    return f"""你是论文分类助手。将论文分为以下一个或多个类别：{classify_types}，都不属于时为Unknown。
+只返回JSON列表，如：["{classify_types[0]}","{classify_types[1]}"]"""
+
+def batch_prompt_template(papers):
+    return json.dumps(
+        [{"id": paper['id'], "title": paper['title'], "abstract": paper['abstract']} for paper in papers],
+        ensure_ascii=False,
+        separators=(',', ':')
+    )
+
+def valid_labels(result):
+    """模型返回的分类结果须为非空的字符串列表"""
+    return isinstance(result, list) and bool(result) and all(isinstance(label, str) for label in result)
+
+def batch_system_prompt(classify_types):
+    return f"""你是论文分类助手。输入是JSON数组，元素含论文的id、title和abstract。
+将每篇论文分为以下一个或多个类别：{classify_types}，都不属于时为Unknown。
+只返回JSON对象，键为论文id，值为类别列表，如：{{"<id>": ["{classify_types[0]}","{classify_types[1]}"]}}"""
 
 class BytedanceClassifier:
-    def __init__(self, use_ai=True, base_url=None, model_id=None, classify_types=[], max_workers=16):
+    def __init__(self, use_ai=True, base_url=None, model_id=None, classify_types=[], response_cache=None, controller=None,
+                 batch_size=20, batch_max_tokens=6000, abstract_max_tokens=None, token_usage=None, metrics=None):
         assert len(classify_types) > 0, "classify_types must be a non-empty list"
+        self.batch_system_prompt = batch_system_prompt(classify_types)
+        self.batch_size = batch_size
+        self.batch_max_tokens = batch_max_tokens
+        # 分类只需要摘要的前几句，超出预算的部分截掉以节省输入token
+        self.abstract_max_tokens = abstract_max_tokens
         self.ai_client = ByteDanceAIClient(
             use_ai=use_ai,
             base_url=base_url,
             model_id=model_id,
-            default_system_prompt=system_prompt(classify_types)
+            default_system_prompt=system_prompt(classify_types),
+            response_cache=response_cache,
+            controller=controller,
+            token_usage=token_usage,
+            metrics=metrics
         )
-        self.thread_pool = ThreadPoolExecutor(max_workers=max_workers)
 
-    def classify_paper(self, title, abstract):
+    async def classify_paper(self, title, abstract):
         if not self.ai_client.use_ai:
             return "Global"
             
-        user_content = prompt_template(title, abstract)
+        user_content = prompt_template(title, compact_text(abstract, self.abstract_max_tokens))
+        
+        result = await self.ai_client.generate_response(
+            user_content=user_content,
+            parse_json=True,
+            validate=valid_labels
+        )
+        
+        return result if valid_labels(result) else "Global"
+
+    async def classify_papers(self, papers: List[Dict], cached_ids: Optional[Set[str]] = None) -> Dict[str, List[str]]:
+        """
+        批量分类：按数量和token预算把多篇论文打包到一个请求中
         
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        Args:
+            papers: 包含id、title、abstract的论文字典列表
+            cached_ids: 可选，结果取自按论文缓存（而非本次API响应）的论文id会加入该集合
         
+        Returns:
+            论文id到分类结果列表的映射，请求失败或响应无效的论文不在其中
+        """
+        if not self.ai_client.use_ai:
+            return {paper['id']: ["Global"] for paper in papers}
+
+        papers = [{
+            'id': paper['id'],
+            'title': paper['title'],
+            'abstract': compact_text(paper['abstract'], self.abstract_max_tokens)
+        } for paper in papers]
+        # 先查每篇论文单独缓存的分类结果，只把未命中的论文打包请求
+        contents = {paper['id']: batch_prompt_template([paper]) for paper in papers}
+        categories = {
+            paper_id: labels for paper_id, labels in
+            self.ai_client.get_cached_items(self.batch_system_prompt, contents).items() if valid_labels(labels)
+        }
+        if cached_ids is not None:
+            cached_ids.update(categories)
+        papers = [paper for paper in papers if paper['id'] not in categories]
+        results = await asyncio.gather(*(
+            self._classify_batch(batch) for batch in make_batches(
+                papers, self.batch_size, self.batch_max_tokens,
+                lambda paper: estimate_tokens(paper['title']) + estimate_tokens(paper['abstract'])
+            )
+        ))
+        for result in results:
+            categories.update(result)
+            self.ai_client.put_cached_items(
+                self.batch_system_prompt,
+                {paper_id: (contents[paper_id], labels) for paper_id, labels in result.items()}
+            )
+        return categories
+
+    async def _classify_batch(self, batch: List[Dict]) -> Dict[str, List[str]]:
         try:
-            result = loop.run_until_complete(
-                self.ai_client.generate_response(
-                    user_content=user_content,
-                    parse_json=True
+            if len(batch) == 1:
+                paper = batch[0]
+                result = await self.ai_client.generate_response(
+                    user_content=prompt_template(paper['title'], paper['abstract']),
+                    parse_json=True,
+                    raise_errors=True,
+                    validate=valid_labels
                 )
+                # 无效的结果不返回，论文计为失败，下次运行重新分类
+                return {paper['id']: result} if valid_labels(result) else {}
+
+            result = await self.ai_client.generate_response(
+                user_content=batch_prompt_template(batch),
+                system_prompt=self.batch_system_prompt,
+                parse_json=True,
+                raise_errors=True,
+                validate=lambda result: isinstance(result, dict)
             )
-        finally:
-            loop.close()
-        
-        return result if result is not None else "Global"
+        except Exception as e:
+            # 没有拿到响应（请求失败、熔断、超出预算）时拆分重试只会产生更多失败的请求；
+            # 这些论文不返回结果，不写入检查点，下次 --resume 时重新分类
+            print(f"Error classifying papers: {e}")
+            return {}
+
+        categories = {}
+        if isinstance(result, dict):
+            for paper in batch:
+                labels = result.get(paper['id'])
+                if valid_labels(labels):
+                    categories[paper['id']] = labels
+
+        missing = [paper for paper in batch if paper['id'] not in categories]
+        if len(missing) == len(batch):
+            # 收到了响应但整批无效时对半拆分重试，最终退化为单篇请求
+            middle = len(batch) // 2
+            halves = await asyncio.gather(self._classify_batch(batch[:middle]), self._classify_batch(batch[middle:]))
+            for half in halves:
+                categories.update(half)
+        elif missing:
+            # 部分缺失时只重试缺失的论文
+            categories.update(await self._classify_batch(missing))
+        return categories
@@ -1,33 +1,122 @@
 from bytedance_ai_tools.bytedance_ai_client import ByteDanceAIClient
+from bytedance_ai_tools.token_budget import estimate_tokens, make_batches
+from typing import Dict, List, Optional
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import json
+
+def batch_prompt_template(papers):
+    return json.dumps(
+        [{"id": paper['id'], "title": paper['title'], "abstract": paper['abstract']} for paper in papers],
+        ensure_ascii=False,
+        separators=(',', ':')
+    )
+
+def valid_translation(item):
+    return isinstance(item, dict) and isinstance(item.get('title'), str) and isinstance(item.get('abstract'), str)
+
+BATCH_SYSTEM_PROMPT = """你是一个英文到中文的翻译助手。输入是一个JSON数组，每个元素包含论文的id、title和abstract。
+请将每篇论文的title和abstract翻译成中文，保持专业性和准确性。
+只需返回一个JSON对象，键为论文id，值为包含title和abstract译文的对象，不需要解释。
+返回格式为：{"<id>": {"title": "<标题译文>", "abstract": "<摘要译文>"}}"""
 
 class BytedanceTranslator:
-    def __init__(self, use_ai=True, base_url=None, model_id=None):
+    def __init__(self, use_ai=True, base_url=None, model_id=None, response_cache=None, controller=None,
+                 batch_size=4, batch_max_tokens=4000, token_usage=None, metrics=None):
         self.ai_client = ByteDanceAIClient(
             use_ai=use_ai,
             base_url=base_url,
             model_id=model_id,
-            default_system_prompt="你是一个英文到中文的翻译助手。请将给定的英文文本翻译成中文，保持专业性和准确性。只需返回翻译结果，不需要解释。"
+            default_system_prompt="你是一个英文到中文的翻译助手。请将给定的英文文本翻译成中文，保持专业性和准确性。只需返回翻译结果，不需要解释。",
+            response_cache=response_cache,
+            controller=controller,
+            token_usage=token_usage,
+            metrics=metrics
         )
-        self.thread_pool = ThreadPoolExecutor(max_workers=16)
+        self.batch_size = batch_size
+        self.batch_max_tokens = batch_max_tokens
     
-    def translate(self, text):
+    async def translate(self, text):
         if not self.ai_client.use_ai:
             return text
             
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        result = await self.ai_client.generate_response(
+            user_content=text,
+            parse_json=False
+        )
+            
+        return result if result is not None else text
+
+    async def translate_papers(self, papers: List[Dict]) -> Dict[str, Dict[str, str]]:
+        """
+        批量翻译：标题和摘要合并在一个请求中，并按数量和token预算把多篇论文打包
+        
+        Args:
+            papers: 包含id、title、abstract的论文字典列表
         
+        Returns:
+            论文id到 {'title', 'abstract'} 译文的映射，翻译失败的论文不在其中
+        """
+        if not self.ai_client.use_ai:
+            return {paper['id']: {'title': paper['title'], 'abstract': paper['abstract']} for paper in papers}
+
+        # 先查每篇论文单独缓存的译文，只把未命中的论文打包请求
+        contents = {paper['id']: batch_prompt_template([paper]) for paper in papers}
+        translations = {
+            paper_id: item for paper_id, item in
+            self.ai_client.get_cached_items(BATCH_SYSTEM_PROMPT, contents).items() if valid_translation(item)
+        }
+        papers = [paper for paper in papers if paper['id'] not in translations]
+        results = await asyncio.gather(*(
+            self._translate_batch(batch) for batch in make_batches(
+                papers, self.batch_size, self.batch_max_tokens,
+                lambda paper: estimate_tokens(paper['title']) + estimate_tokens(paper['abstract'])
+            )
+        ))
+        for result in results:
+            translations.update(result)
+            self.ai_client.put_cached_items(
+                BATCH_SYSTEM_PROMPT,
+                {paper_id: (contents[paper_id], item) for paper_id, item in result.items()}
+            )
+        return translations
+
+    async def _translate_batch(self, batch: List[Dict]) -> Dict[str, Dict[str, str]]:
         try:
-            result = loop.run_until_complete(
-                self.ai_client.generate_response(
-                    user_content=text,
-                    parse_json=False
-                )
+            result = await self.ai_client.generate_response(
+                user_content=batch_prompt_template(batch),
+                system_prompt=BATCH_SYSTEM_PROMPT,
+                parse_json=True,
+                raise_errors=True,
+                validate=lambda result: isinstance(result, dict)
             )
-        finally:
-            loop.close()
-            
-        return result if result is not None else text
-    
\ No newline at end of file
+        except Exception as e:
+            # 没有拿到响应时不退化为逐条翻译，这些论文留给下次运行
+            print(f"Error translating papers: {e}")
+            return {}
+
+        translations = {}
+        if isinstance(result, dict):
+            for paper in batch:
+                item = result.get(paper['id'])
+                if valid_translation(item):
+                    translations[paper['id']] = {'title': item['title'], 'abstract': item['abstract']}
+
+        # 解析失败或缺失的论文退化为逐条翻译
+        missing = [paper for paper in batch if paper['id'] not in translations]
+        fallbacks = await asyncio.gather(*(self._translate_single(paper) for paper in missing))
+        for paper, translation in zip(missing, fallbacks):
+            if translation is not None:
+                translations[paper['id']] = translation
+        return translations
+
+    async def _translate_single(self, paper: Dict) -> Optional[Dict[str, str]]:
+        """逐条翻译标题和摘要，任一请求失败时返回None，不以原文代替译文"""
+        try:
+            title, abstract = await asyncio.gather(
+                self.ai_client.generate_response(user_content=paper['title'], raise_errors=True),
+                self.ai_client.generate_response(user_content=paper['abstract'], raise_errors=True)
+            )
+        except Exception as e:
+            print(f"Error translating {paper['id']}: {e}")
+            return None
+        return {'title': title, 'abstract': abstract}
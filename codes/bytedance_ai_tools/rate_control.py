@@ -0,0 +1,239 @@
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+
+class CircuitOpenError(Exception):
+    """熔断器打开期间拒绝请求"""
+
+
+def is_overload(error: BaseException) -> bool:
+    """429、5xx和超时说明服务端过载，需要降低并发"""
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    status_code = getattr(error, 'status_code', None)
+    return status_code == 429 or (status_code is not None and status_code >= 500)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """过载和连接类错误可以重试，其余4xx（参数、鉴权等）重试也不会成功"""
+    if is_overload(error):
+        return True
+    return getattr(error, 'status_code', None) is None and not isinstance(error, (ValueError, TypeError))
+
+
+def retry_after_seconds(error: BaseException) -> float:
+    """读取响应中的Retry-After头（秒），没有时返回0"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after', 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class AdaptiveLimiter:
+    def __init__(
+        self,
+        initial: int = 16,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        decrease_factor: float = 0.5,
+        latency_target: Optional[float] = None,
+        cooldown: float = 1.0
+    ):
+        """
+        AIMD并发限制：每次成功加性增长，遇到过载乘性减小
+
+        Args:
+            initial: 初始并发上限
+            min_limit: 并发上限的下界
+            max_limit: 并发上限的上界
+            decrease_factor: 过载时并发上限乘以的系数
+            latency_target: 响应时间超过该值（秒）时也视为过载，为空时不按延迟调整
+            cooldown: 两次减小之间的最短间隔（秒），避免同一波错误连续减半
+        """
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_target = latency_target
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            while self.in_flight >= int(self.limit):
+                await self._condition.wait()
+            self.in_flight += 1
+
+    async def release(self, latency: Optional[float] = None, overloaded: bool = False) -> None:
+        """
+        释放一个并发名额并根据请求结果调整上限
+
+        Args:
+            latency: 成功请求的耗时（秒），失败时为None
+            overloaded: 请求是否因过载失败
+        """
+        async with self._condition:
+            self.in_flight -= 1
+            if latency is not None and self.latency_target and latency > self.latency_target:
+                overloaded = True
+            if overloaded:
+                now = time.monotonic()
+                if now - self._last_decrease >= self.cooldown:
+                    self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                    self._last_decrease = now
+            elif latency is not None:
+                # 每个成功请求增长1/limit，相当于每轮并发窗口增长1
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 10, reset_timeout: float = 30):
+        """
+        连续失败达到阈值后熔断，等待reset_timeout后放行一个试探请求
+
+        Args:
+            failure_threshold: 触发熔断的连续失败次数
+            reset_timeout: 熔断持续时间（秒）
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if self._probing or time.monotonic() - self.opened_at < self.reset_timeout:
+            return False
+        # 半开状态：只放行一个试探请求
+        self._probing = True
+        return True
+
+    def retry_after(self) -> float:
+        """距离下一次允许试探请求的秒数，未熔断时为0"""
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def settle_probe(self) -> None:
+        """试探请求未记录成功或失败就结束时调用，保持熔断并在reset_timeout后放行下一个试探请求"""
+        if self._probing:
+            self._probing = False
+            self.opened_at = time.monotonic()
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing:
+            # 试探请求失败，重新熔断
+            self.opened_at = time.monotonic()
+            self._probing = False
+        elif self.opened_at is None and self.failures >= self.failure_threshold:
+            print(f"Circuit breaker opened after {self.failures} consecutive failures")
+            self.opened_at = time.monotonic()
+
+
+class ApiController:
+    def __init__(
+        self,
+        limiter: Optional[AdaptiveLimiter] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        max_retries: int = 4,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        request_timeout: float = 120
+    ):
+        """
+        统一控制API调用：自适应并发、指数退避加抖动重试、单请求超时和熔断，
+        可在多个客户端间共享
+
+        Args:
+            limiter: 自适应并发限制
+            breaker: 熔断器
+            max_retries: 最大重试次数
+            base_delay: 退避的初始等待时间（秒）
+            max_delay: 退避的最长等待时间（秒）
+            request_timeout: 单个请求的超时时间（秒）
+        """
+        self.limiter = limiter or AdaptiveLimiter()
+        self.breaker = breaker or CircuitBreaker()
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.request_timeout = request_timeout
+        self.retries = 0
+        self.failures = 0
+
+    def backoff(self, attempt: int) -> float:
+        """full jitter：在[0, min(max_delay, base_delay * 2^attempt)]内均匀取值"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def call(self, request: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        执行一次API调用，失败时按策略重试
+
+        Args:
+            request: 每次调用都返回新协程的函数
+
+        Returns:
+            request的返回值；重试耗尽或遇到不可重试的错误时抛出最后一次的异常
+        """
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                # 熔断期间不发请求，等到可以试探时再占用一次重试机会
+                if attempt == self.max_retries:
+                    self.failures += 1
+                    raise CircuitOpenError("API circuit breaker is open")
+                await asyncio.sleep(max(self.breaker.retry_after(), self.backoff(attempt)))
+                continue
+            # 熔断器打开后放行的第一个请求是试探请求
+            probing = self.breaker.opened_at is not None
+            try:
+                result = await self._attempt(request)
+            except Exception as e:
+                if not is_retryable(e):
+                    self.failures += 1
+                    raise
+                # 429是服务端的限流信号，只降并发和退避，不计入熔断
+                if getattr(e, 'status_code', None) != 429:
+                    self.breaker.record_failure()
+                if attempt == self.max_retries:
+                    self.failures += 1
+                    raise
+                self.retries += 1
+                await asyncio.sleep(max(self.backoff(attempt), retry_after_seconds(e)))
+                continue
+            else:
+                self.breaker.record_success()
+                return result
+            finally:
+                if probing:
+                    # 试探请求以429、不可重试的错误或取消结束时既不算成功也不算失败，重新计时后再试探
+                    self.breaker.settle_probe()
+
+    async def _attempt(self, request: Callable[[], Awaitable[Any]]) -> Any:
+        """占用一个并发名额执行一次请求，成功、失败或被取消时都释放名额"""
+        await self.limiter.acquire()
+        start = time.monotonic()
+        latency, overloaded = None, False
+        try:
+            result = await asyncio.wait_for(request(), self.request_timeout)
+            latency = time.monotonic() - start
+            return result
+        except Exception as e:
+            overloaded = is_overload(e)
+            raise
+        finally:
+            await self.limiter.release(latency=latency, overloaded=overloaded)
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+
+class ResponseCache:
+    def __init__(self, path: str, max_entries: int = 200000):
+        """
+        LLM响应缓存，以(model_id, messages)的哈希为键持久化到SQLite，按LRU淘汰
+
+        Args:
+            path: SQLite数据库文件路径
+            max_entries: 最多保留的响应数量
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model_id: Optional[str], messages: List[Dict[str, str]]) -> str:
+        """
+        计算缓存键，messages中已包含system prompt
+
+        Args:
+            model_id: 模型ID
+            messages: 发送给模型的消息列表
+        """
+        payload = json.dumps({'model': model_id, 'messages': messages}, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def make_item_key(model_id: Optional[str], system_prompt: str, user_content: str) -> str:
+        """
+        批量请求中单篇论文结果的缓存键，与整条请求的键不在同一命名空间，
+        只取决于模型、system prompt和该论文自身的内容，与同批的其他论文无关
+
+        Args:
+            model_id: 模型ID
+            system_prompt: 批量请求的system prompt
+            user_content: 只含这一篇论文时的user内容
+        """
+        payload = json.dumps(
+            {'model': model_id, 'item': {'system': system_prompt, 'user': user_content}},
+            ensure_ascii=False,
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            return row[0]
+
+    def put(self, key: str, response: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, accessed_at) VALUES (?, ?, ?)",
+                (key, response, time.time())
+            )
+            self._conn.execute("""
+                DELETE FROM responses WHERE rowid IN (
+                    SELECT rowid FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+            self._conn.commit()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """在一个事务中查找多个键，返回命中的 键 -> 响应"""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            # SQLite默认最多999个绑定参数
+            for offset in range(0, len(keys), 500):
+                chunk = keys[offset:offset + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, response FROM responses WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE responses SET accessed_at = ? WHERE key = ?", [(now, key) for key in found]
+                )
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: Dict[str, str]) -> None:
+        """在一个事务中写入多个 键 -> 响应"""
+        if not items:
+            return
+        with self._lock:
+            now = time.time()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO responses (key, response, accessed_at) VALUES (?, ?, ?)",
+                [(key, response, now) for key, response in items.items()]
+            )
+            self._conn.execute("""
+                DELETE FROM responses WHERE rowid IN (
+                    SELECT rowid FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
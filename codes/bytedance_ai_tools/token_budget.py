@@ -0,0 +1,151 @@
+from typing import Any, Callable, Dict, List, Optional
+import re
+
+CJK_PATTERN = re.compile(r'[　-〿一-鿿＀-￯]')
+SENTENCE_END_PATTERN = re.compile(r'(?<=[.!?。！？])\s+')
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估计文本的token数：中文字符按每字1个token，其余按每4个字符1个token
+
+    Args:
+        text: 待估计的文本
+    """
+    if not text:
+        return 0
+    cjk = len(CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def estimate_message_tokens(messages: List[Dict[str, str]]) -> int:
+    """估计一组聊天消息的输入token数，每条消息另加约4个token的格式开销"""
+    return sum(estimate_tokens(message['content']) + 4 for message in messages)
+
+
+def compact_text(text: str, max_tokens: Optional[int]) -> str:
+    """
+    把文本压缩到token预算以内：合并多余空白，按句子截断，第一句就超出预算时按字符截断
+
+    Args:
+        text: 待压缩的文本
+        max_tokens: token预算，为空时只合并空白
+    """
+    text = ' '.join((text or '').split())
+    if not max_tokens or estimate_tokens(text) <= max_tokens:
+        return text
+    kept, used = [], 0
+    for sentence in SENTENCE_END_PATTERN.split(text):
+        tokens = estimate_tokens(sentence) + 1
+        if used + tokens > max_tokens:
+            break
+        kept.append(sentence)
+        used += tokens
+    if kept:
+        return ' '.join(kept)
+    return text[:len(text) * max_tokens // estimate_tokens(text)]
+
+
+def make_batches(items: List[Dict], batch_size: int, max_tokens: int, count_tokens: Callable[[Dict], int]) -> List[List[Dict]]:
+    """
+    按条数和token预算切分批次，单条超出预算时独占一个批次
+
+    Args:
+        items: 待切分的条目
+        batch_size: 每批最多条数
+        max_tokens: 每批的token预算
+        count_tokens: 估计单个条目token数的函数
+    """
+    batches, batch, batch_tokens = [], [], 0
+    for item in items:
+        tokens = count_tokens(item)
+        if batch and (len(batch) >= batch_size or batch_tokens + tokens > max_tokens):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(item)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class TokenBudgetExceeded(Exception):
+    """token预算用尽，请求未发送"""
+
+
+class TokenUsage:
+    def __init__(self, max_tokens: Optional[int] = None):
+        """
+        统计一次运行的token用量，并在超出预算时拒绝新的请求
+
+        Args:
+            max_tokens: 本次运行输入加输出的token上限，为空时不限制
+        """
+        self.max_tokens = max_tokens
+        self.requests = 0
+        self.cached = 0
+        self.rejected = 0
+        self.estimated_prompt_tokens = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        # 已发出但还没有返回usage的请求的预估token数
+        self.reserved = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def reserve(self, estimate: int) -> bool:
+        """
+        发请求前预留token，加上预留后超出预算时返回False
+
+        Args:
+            estimate: 请求的预估输入token数
+        """
+        # 按已完成请求的实际总用量/预估输入的比例放大预留，把输出token和估计误差也算进去
+        scale = self.total_tokens / self.estimated_prompt_tokens if self.estimated_prompt_tokens else 1.0
+        if self.max_tokens and self.total_tokens + (self.reserved + estimate) * scale > self.max_tokens:
+            if not self.rejected:
+                print(f"Token budget of {self.max_tokens} exhausted, skipping further API calls")
+            self.rejected += 1
+            return False
+        self.reserved += estimate
+        return True
+
+    def record(self, estimate: int, usage: Any = None) -> None:
+        """
+        记录一次成功请求的用量，释放预留
+
+        Args:
+            estimate: reserve时使用的预估输入token数
+            usage: 响应中的usage字段，缺失时按预估值计入输入token
+        """
+        self.reserved -= estimate
+        self.requests += 1
+        self.estimated_prompt_tokens += estimate
+        self.prompt_tokens += getattr(usage, 'prompt_tokens', None) or estimate
+        self.completion_tokens += getattr(usage, 'completion_tokens', None) or 0
+
+    def release(self, estimate: int) -> None:
+        """请求失败时释放预留"""
+        self.reserved -= estimate
+
+    def reset(self) -> None:
+        """开始新的统计周期（常驻服务的每轮轮询），预算重新计算；不影响在途请求的预留"""
+        self.requests = 0
+        self.cached = 0
+        self.rejected = 0
+        self.estimated_prompt_tokens = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'requests': self.requests,
+            'cached': self.cached,
+            'rejected': self.rejected,
+            'estimated_prompt_tokens': self.estimated_prompt_tokens,
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'total_tokens': self.total_tokens
+        }
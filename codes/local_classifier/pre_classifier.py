@@ -0,0 +1,228 @@
+import numpy as np
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import json
+import os
+import re
+import threading
+
+TOKEN_PATTERN = re.compile(r"[a-z][a-z0-9\-]+")
+SUBJECT_CODE_PATTERN = re.compile(r"\(([^()]+)\)\s*$|^([a-z\-]+(?:\.[A-Za-z\-]+)?)$")
+STOPWORDS = frozenset(
+    "the and for with that this from are our can has have its into not such these those which while "
+    "their based using use used via also than them they been more most over both each new two show "
+    "paper propose proposed approach method methods results work study".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def subject_code(subject: str) -> Optional[str]:
+    """从 'Computer Vision and Pattern Recognition (cs.CV)' 中取出 cs.CV，export API给出的 'cs.CV' 原样返回"""
+    match = SUBJECT_CODE_PATTERN.search((subject or '').strip())
+    return (match.group(1) or match.group(2)) if match else None
+
+
+class PreClassifier:
+    def __init__(
+        self,
+        classify_types: List[str],
+        subject_rules: Optional[Dict[str, List[str]]] = None,
+        label_path: Optional[str] = None,
+        vocab_size: int = 4096,
+        min_samples: int = 200,
+        threshold: float = 0.9,
+        epochs: int = 100,
+        learning_rate: float = 5.0
+    ):
+        """
+        本地预分类：先按arXiv主分类的规则分类，再用历史LLM标注训练的TF-IDF逻辑回归分类，
+        只把没有把握的论文交给LLM
+
+        Args:
+            classify_types: 分类类别列表
+            subject_rules: arXiv分类代码到类别列表的映射，如 {'cs.CV': ['CV']}，按主分类匹配
+            label_path: 保存LLM分类结果的JSONL文件，用作训练数据
+            vocab_size: TF-IDF词表大小
+            min_samples: 训练模型所需的最少样本数，不足时只使用规则
+            threshold: 每个类别的预测概率都高于threshold或低于1-threshold时才视为有把握
+            epochs: 训练轮数
+            learning_rate: 梯度下降的学习率
+        """
+        self.classify_types = list(classify_types)
+        self.subject_rules = subject_rules or {}
+        self.label_path = label_path
+        self.vocab_size = vocab_size
+        self.min_samples = min_samples
+        self.threshold = threshold
+        self.epochs = epochs
+        self.learning_rate = learning_rate
+        self.vocabulary: Dict[str, int] = {}
+        self.idf: Optional[np.ndarray] = None
+        self.weights: Optional[np.ndarray] = None
+        self.bias: Optional[np.ndarray] = None
+        self.rule_hits = 0
+        self.model_hits = 0
+        self.escalated = 0
+        self._lock = threading.Lock()
+
+    @property
+    def trained(self) -> bool:
+        return self.weights is not None
+
+    def _load_samples(self) -> Tuple[List[str], np.ndarray]:
+        texts, labels = [], []
+        if not self.label_path or not os.path.exists(self.label_path):
+            return texts, np.zeros((0, len(self.classify_types)), dtype=np.float32)
+        index = {label: i for i, label in enumerate(self.classify_types)}
+        # 同一论文可能被记录多次（如旧版本在重跑时重复追加），按id去重，保留最后一次的结果
+        samples: Dict[str, Dict] = {}
+        with open(self.label_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    sample = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                samples.pop(sample.get('id'), None)
+                samples[sample.get('id')] = sample
+        for sample in samples.values():
+            row = np.zeros(len(self.classify_types), dtype=np.float32)
+            for label in sample['labels']:
+                if label in index:
+                    row[index[label]] = 1
+            if row.any():
+                texts.append(f"{sample['title']} {sample['abstract']}")
+                labels.append(row)
+        return texts, np.array(labels, dtype=np.float32).reshape(-1, len(self.classify_types))
+
+    def _term_counts(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """把文本转为CSR格式的词频矩阵 (indptr, indices, counts)，只保留词表中的词"""
+        indptr, indices, counts = [0], [], []
+        for text in texts:
+            counter = Counter(self.vocabulary[token] for token in tokenize(text) if token in self.vocabulary)
+            indices.extend(counter.keys())
+            counts.extend(counter.values())
+            indptr.append(len(indices))
+        return (
+            np.array(indptr, dtype=np.int64),
+            np.array(indices, dtype=np.int64),
+            np.array(counts, dtype=np.float32)
+        )
+
+    def _tfidf(self, csr: Tuple[np.ndarray, np.ndarray, np.ndarray], start: int, stop: int) -> np.ndarray:
+        """把CSR矩阵的[start, stop)行展开为L2归一化的稠密TF-IDF矩阵"""
+        indptr, indices, counts = csr
+        lo, hi = indptr[start], indptr[stop]
+        matrix = np.zeros((stop - start, len(self.vocabulary)), dtype=np.float32)
+        rows = np.repeat(np.arange(stop - start), np.diff(indptr[start:stop + 1]))
+        matrix[rows, indices[lo:hi]] = np.log1p(counts[lo:hi]) * self.idf[indices[lo:hi]]
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+    def train(self, batch_size: int = 2048) -> bool:
+        """
+        用历史LLM分类结果训练一对多逻辑回归
+
+        Returns:
+            样本足够并完成训练时返回True
+        """
+        texts, labels = self._load_samples()
+        if len(texts) < self.min_samples:
+            return False
+
+        tokenized = [set(tokenize(text)) for text in texts]
+        document_frequency = Counter(token for tokens in tokenized for token in tokens)
+        self.vocabulary = {
+            token: i for i, (token, _) in enumerate(document_frequency.most_common(self.vocab_size))
+        }
+        df = np.array([document_frequency[token] for token in self.vocabulary], dtype=np.float32)
+        self.idf = np.log((1 + len(texts)) / (1 + df)) + 1
+
+        csr = self._term_counts(texts)
+        weights = np.zeros((len(self.vocabulary), len(self.classify_types)), dtype=np.float32)
+        bias = np.zeros(len(self.classify_types), dtype=np.float32)
+        chunks = [(start, min(start + batch_size, len(texts))) for start in range(0, len(texts), batch_size)]
+        features = [self._tfidf(csr, start, stop) for start, stop in chunks] if len(chunks) == 1 else None
+        for _ in range(self.epochs):
+            for i, (start, stop) in enumerate(chunks):
+                x = features[i] if features else self._tfidf(csr, start, stop)
+                y = labels[start:stop]
+                probabilities = 1 / (1 + np.exp(-(x @ weights + bias)))
+                gradient = probabilities - y
+                weights -= self.learning_rate * (x.T @ gradient / len(x) + 1e-4 * weights)
+                bias -= self.learning_rate * gradient.mean(axis=0)
+        self.weights, self.bias = weights, bias
+        return True
+
+    def predict_proba(self, papers: List[Dict]) -> np.ndarray:
+        """返回每篇论文属于每个类别的概率，形状为 (len(papers), len(classify_types))"""
+        texts = [f"{paper['title']} {paper['abstract']}" for paper in papers]
+        x = self._tfidf(self._term_counts(texts), 0, len(texts))
+        return 1 / (1 + np.exp(-(x @ self.weights + self.bias)))
+
+    def classify(self, papers: List[Dict]) -> Dict[str, List[str]]:
+        """
+        对有把握的论文直接给出分类
+
+        Args:
+            papers: 包含id、title、abstract、primary_subject的论文字典列表
+
+        Returns:
+            有把握的论文id到分类结果列表的映射，其余论文需要交给LLM
+        """
+        results = {}
+        remaining = []
+        for paper in papers:
+            labels = self.subject_rules.get(subject_code(paper.get('primary_subject', '')))
+            if labels:
+                results[paper['id']] = list(labels)
+            else:
+                remaining.append(paper)
+        rule_hits = len(results)
+
+        if remaining and self.trained:
+            probabilities = self.predict_proba(remaining)
+            positive = probabilities >= self.threshold
+            confident = ((positive | (probabilities <= 1 - self.threshold)).all(axis=1)) & positive.any(axis=1)
+            for paper, is_confident, row in zip(remaining, confident, positive):
+                if is_confident:
+                    results[paper['id']] = [label for label, hit in zip(self.classify_types, row) if hit]
+
+        with self._lock:
+            self.rule_hits += rule_hits
+            self.model_hits += len(results) - rule_hits
+            self.escalated += len(papers) - len(results)
+        return results
+
+    def record(self, papers: List[Dict], categories_by_id: Dict[str, List[str]]) -> None:
+        """
+        保存LLM的分类结果，供下次运行训练模型
+
+        Args:
+            papers: 论文信息字典列表
+            categories_by_id: LLM返回的论文id到分类结果列表的映射
+        """
+        if not self.label_path:
+            return
+        lines = [
+            json.dumps({
+                'id': paper['id'],
+                'title': paper['title'],
+                'abstract': paper['abstract'],
+                'labels': categories_by_id[paper['id']]
+            }, ensure_ascii=False)
+            for paper in papers if categories_by_id.get(paper['id'])
+        ]
+        if not lines:
+            return
+        directory = os.path.dirname(self.label_path)
+        with self._lock:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.label_path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+
+    def stats(self) -> Dict[str, int]:
+        return {'rules': self.rule_hits, 'model': self.model_hits, 'escalated': self.escalated}
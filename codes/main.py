@@ -1,14 +1,32 @@
 import argparse
+from datetime import date
 import yaml
 from url_tools.arxiv_fetcher import ArxivFetcher
 from bytedance_ai_tools.bytedance_classifier import BytedanceClassifier
 from bytedance_ai_tools.bytedance_translator import BytedanceTranslator
 import pdb
+import requests
 from datetime import datetime, timezone, timedelta
-from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import os
+import signal
+import sys
 import time
 from url_tools.arxiv_latest import ArxivWebScraper
-from markdown.writer import MarkdownWriter
+from url_tools.paper_cache import PaperCache
+from url_tools.http_cache import HttpCache
+from url_tools.arxiv_backfill import ArxivBackfill
+from markdown.writer import IncrementalMarkdownWriter
+from sinks.structured import JsonlSink, MultiSink, ParquetSink, pa
+from pipeline.stream import StreamingPipeline
+from pipeline.checkpoint import CheckpointJournal
+from pipeline.service import LatestResults, PollingService, ResultsServer
+from pipeline.shards import ShardWorker, WorkQueue, merge_results, plan_shards
+from local_classifier.pre_classifier import PreClassifier
+from bytedance_ai_tools.response_cache import ResponseCache
+from bytedance_ai_tools.rate_control import AdaptiveLimiter, ApiController, CircuitBreaker
+from bytedance_ai_tools.token_budget import TokenUsage
+from monitoring.metrics import Metrics
 
 def load_config(config_path):
     with open(config_path, 'r', encoding='utf-8') as f:
@@ -18,111 +36,405 @@ def parse_args():
     parser = argparse.ArgumentParser(description='ArXiv Paper Fetcher and Classifier')
     parser.add_argument('--config', type=str, default='configs/config.yaml',
                       help='Path to configuration file (default: configs/config.yaml)')
-    return parser.parse_args()
+    parser.add_argument('--resume', action='store_true',
+                      help='Resume an interrupted run from its checkpoint journal, skipping completed work')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--backfill-from', type=date.fromisoformat, metavar='YYYY-MM-DD',
+                      help='Backfill papers submitted from this date via the export API instead of reading /recent')
+    mode.add_argument('--serve', action='store_true',
+                      help='Run as a long-lived service: poll listings on a schedule and serve results over HTTP')
+    parser.add_argument('--backfill-to', type=date.fromisoformat, metavar='YYYY-MM-DD',
+                      help='Last day of the backfill (default: today)')
+    parser.add_argument('--quiet', action='store_true',
+                      help='Do not print progress status lines (for scheduled runs)')
+    sharding = parser.add_argument_group('sharded execution')
+    sharding.add_argument('--queue', metavar='DIR',
+                      help='Work queue directory, may be on a filesystem shared between hosts')
+    sharding.add_argument('--plan', type=int, metavar='SHARDS',
+                      help='Read the listings and split the papers into this many shards in the queue')
+    sharding.add_argument('--work', type=int, metavar='PROCESSES',
+                      help='Run queued shards in this many local processes until the queue is empty')
+    sharding.add_argument('--merge', action='store_true',
+                      help='Combine the results of completed shards into the configured outputs')
+    args = parser.parse_args()
+    if (args.plan or args.work or args.merge) and not args.queue:
+        parser.error('--plan, --work and --merge require --queue')
+    if args.queue and (args.serve or args.backfill_from):
+        parser.error('--queue cannot be combined with --serve or --backfill-from')
+    return args
 
-def process_paper(paper: dict, translator: BytedanceTranslator, classifier: BytedanceClassifier) -> tuple:
+def build_sinks(config, date_range=None):
     """
-    处理单篇论文：翻译和分类
-    
+    按配置创建输出端
+
     Args:
-        paper: 论文信息字典
-        translator: 翻译器实例
-        classifier: 分类器实例
-    
-    Returns:
-        tuple: (translated_paper, categories_list)
+        config: 配置字典
+        date_range: Markdown标题中的 (开始, 结束) 日期，默认为最近arxiv.days天
     """
-    try:
-        # If AI translation is enabled, translate; otherwise use original content
-        if translator.ai_client.use_ai:
-            translated_paper = {
-                'title': translator.translate(paper['title']),
-                'abstract': translator.translate(paper['abstract']),
-                'url': paper['url']
-            }
-        else:
-            translated_paper = {
-                'title': paper['title'],
-                'abstract': paper['abstract'],
-                'url': paper['url']
-            }
-        if classifier.ai_client.use_ai:
-            categories_list = classifier.classify_paper(paper['title'], paper['abstract'])
+    output_config = config['output']
+    sinks = []
+    # 论文边处理边写入，并与已有输出合并；分片任务不写Markdown，由合并步骤统一生成
+    if output_config.get('file_path'):
+        sinks.append(IncrementalMarkdownWriter(
+            output_config['file_path'],
+            config,
+            merge=output_config.get('merge', True),
+            flush_every=output_config.get('flush_every', 50),
+            date_range=date_range
+        ))
+    # 结构化输出保留作者、arXiv分类、PDF链接等Markdown中没有的字段，供下游直接加载
+    if output_config.get('jsonl_path'):
+        sinks.append(JsonlSink(
+            output_config['jsonl_path'],
+            merge=output_config.get('merge', True),
+            flush_every=output_config.get('flush_every', 50)
+        ))
+    if output_config.get('parquet_dir'):
+        if pa is None:
+            print("pyarrow is not installed, skipping Parquet output")
         else:
-            categories_list = ["others"]
+            sinks.append(ParquetSink(
+                output_config['parquet_dir'],
+                merge=output_config.get('merge', True),
+                row_group_size=output_config.get('parquet_row_group_size', 1000)
+            ))
+    return sinks
 
-        return translated_paper, categories_list
-    except Exception as e:
-        print(f"Error processing paper {paper['title']}: {e}")
-        return None, None
+def run_sharded(args, config, scraper):
+    """
+    分片执行：--plan 读取列表页并把论文切分为任务写入队列，--work 在本机领取并执行任务，
+    --merge 把已完成任务的结果合并为最终输出。多台机器共享队列目录时各自运行 --work 即可
+    """
+    shard_config = config.get('sharding', {})
+    queue = WorkQueue(
+        args.queue,
+        lease_seconds=shard_config.get('lease_minutes', 60) * 60,
+        max_attempts=shard_config.get('max_attempts', 3)
+    )
+    if args.plan:
+        if any(queue.counts().values()):
+            print(f"Work queue {args.queue} is not empty: {queue.counts()}")
+            exit(1)
+        try:
+            tasks = plan_shards(scraper, config['arxiv']['categories'], config['arxiv']['max_papers'], args.plan)
+        except requests.RequestException as e:
+            # 缺少某个分类的计划会让该分类的论文永远不被处理，宁可整体失败后重新规划
+            print(f"Error planning shards: {e}")
+            exit(1)
+        for task in tasks:
+            queue.enqueue(task)
+        print(f"Planned {len(tasks)} shards of "
+              f"{max((sum(len(papers) for papers in task['listing'].values()) for task in tasks), default=0)} "
+              f"papers at most in {args.queue}")
+    if args.work:
+        worker = ShardWorker(queue, config, [sys.executable, os.path.abspath(__file__)], processes=args.work)
+        worker.run()
+        print(f"Worker {worker.worker_id}: {worker.completed} shards completed, {worker.failed} failed")
+    if args.merge:
+        counts = queue.counts()
+        if counts['pending'] or counts['claimed']:
+            print(f"Merging before all shards are done: {counts}")
+        output = MultiSink(build_sinks(config))
+        try:
+            total = merge_results(queue, output)
+        finally:
+            output.close()
+        print(f"Merged {total} papers from {counts['done']} shards")
+        if counts['failed']:
+            print(f"{counts['failed']} shards failed, see {os.path.join(args.queue, 'failed')}")
+            exit(1)
 
 def main():
     start_time = time.time()
     args = parse_args()
     config = load_config(args.config)
+    metrics_config = config.get('metrics', {})
+    service_config = config.get('service', {})
+    # 常驻服务只保留最近的耗时样本，避免内存随运行时间增长
+    metrics = Metrics(max_samples=service_config.get('max_metric_samples', 10000) if args.serve else None)
     
     # 初始化论文获取器
-    scraper = ArxivWebScraper()
-    print(f"Fetching papers... Time elapsed: {time.time() - start_time:.2f}s")
-    
-    # 从配置中获取要查询的分类
-    categories_to_fetch = config['arxiv']['categories']
-    papers = []
-    
-    # 获取每个分类的论文
-    for category in categories_to_fetch:
-        category_papers = scraper.get_latest_papers(
-            category=category,
-            max_results=config['arxiv']['max_papers']
+    cache_config = config.get('cache', {})
+    paper_cache = None
+    if cache_config.get('paper_db'):
+        paper_cache = PaperCache(
+            cache_config['paper_db'],
+            ttl_days=cache_config.get('paper_ttl_days', 30),
+            max_entries=cache_config.get('paper_max_entries', 100000)
         )
-        papers.extend(category_papers)
-        print(f"Fetched {len(category_papers)} papers from {category}")
-    
-    print(f"Found {len(papers)} papers in total. Time elapsed: {time.time() - start_time:.2f}s")
-    
-    # 转换论文格式以适配后续处理
-    formatted_papers = [{
-        'title': paper['title'],
-        'abstract': paper.get('abstract', ''),
-        'url': paper['arxiv_url']
-    } for paper in papers]
-
-    # 初始化翻译器和分类器
+    http_cache = None
+    if cache_config.get('http_dir'):
+        http_cache = HttpCache(
+            cache_config['http_dir'],
+            max_bytes=int(cache_config.get('http_max_mb', 512) * 2 ** 20),
+            max_age=cache_config.get('http_max_age', 0)
+        )
+    scraper = ArxivWebScraper(
+        base_url=config['arxiv'].get('base_url', 'https://arxiv.org'),
+        export_url=config['arxiv'].get('export_url', 'http://export.arxiv.org/api/query'),
+        abstract_batch_size=config['arxiv'].get('abstract_batch_size', 100),
+        paper_cache=paper_cache,
+        rate_limit=config['arxiv'].get('rate_limit', 1.0),
+        export_rate_limit=config['arxiv'].get('export_rate_limit', 1 / 3),
+        burst=config['arxiv'].get('burst', 1),
+        fetch_workers=config['arxiv'].get('fetch_workers', 4),
+        parser=config['arxiv'].get('parser'),
+        metrics=metrics,
+        quiet=args.quiet or metrics_config.get('quiet', False),
+        http_cache=http_cache
+    )
+
+    if args.queue:
+        run_sharded(args, config, scraper)
+        if paper_cache is not None:
+            paper_cache.close()
+        if http_cache is not None:
+            http_cache.close()
+        print(f"All done! Total time elapsed: {time.time() - start_time:.2f}s")
+        return
+
+    # 初始化翻译器和分类器，两者共享同一个响应缓存和API调用控制器
+    response_cache = None
+    if cache_config.get('response_db'):
+        response_cache = ResponseCache(
+            cache_config['response_db'],
+            max_entries=cache_config.get('response_max_entries', 200000)
+        )
+    api_config = config['api']
+    controller = ApiController(
+        limiter=AdaptiveLimiter(
+            initial=api_config.get('initial_concurrency', 16),
+            min_limit=api_config.get('min_concurrency', 1),
+            max_limit=api_config.get('max_concurrency', 64),
+            latency_target=api_config.get('latency_target')
+        ),
+        breaker=CircuitBreaker(
+            failure_threshold=api_config.get('breaker_threshold', 10),
+            reset_timeout=api_config.get('breaker_reset', 30)
+        ),
+        max_retries=api_config.get('max_retries', 4),
+        base_delay=api_config.get('retry_base_delay', 1.0),
+        max_delay=api_config.get('retry_max_delay', 30.0),
+        request_timeout=api_config.get('request_timeout', 120)
+    )
+    # 统计本次运行的token用量，超出max_run_tokens后不再调用API
+    token_usage = TokenUsage(max_tokens=api_config.get('max_run_tokens'))
+
     translator = BytedanceTranslator(
         use_ai=config['api']['use_ai'],
         base_url=config['api']['base_url'],
-        model_id=config['api']['model_id']
+        model_id=config['api']['model_id'],
+        response_cache=response_cache,
+        controller=controller,
+        batch_size=config['api'].get('translate_batch_size', 4),
+        batch_max_tokens=config['api'].get('translate_batch_tokens', 4000),
+        token_usage=token_usage,
+        metrics=metrics
     )
     
     classifier = BytedanceClassifier(
         use_ai=config['api']['use_ai'],
         base_url=config['api']['base_url'],
         model_id=config['api']['model_id'],
-        classify_types=config['categories']
+        classify_types=config['categories'],
+        response_cache=response_cache,
+        controller=controller,
+        batch_size=config['api'].get('classify_batch_size', 20),
+        batch_max_tokens=config['api'].get('classify_batch_tokens', 6000),
+        abstract_max_tokens=config['api'].get('classify_abstract_tokens'),
+        token_usage=token_usage,
+        metrics=metrics
     )
-    categories = {}
-    
-    print(f"Processing papers with translation and classification...")
+
+    # 本地预分类：规则和历史LLM标注训练的模型有把握时不再调用LLM
+    pre_classifier = None
+    pre_config = config.get('pre_classifier', {})
+    if pre_config.get('enabled'):
+        pre_classifier = PreClassifier(
+            config['categories'],
+            subject_rules=pre_config.get('subject_rules'),
+            label_path=pre_config.get('label_path'),
+            vocab_size=pre_config.get('vocab_size', 4096),
+            min_samples=pre_config.get('min_samples', 200),
+            threshold=pre_config.get('threshold', 0.9)
+        )
+        with metrics.timer('stage_train_seconds'):
+            trained = pre_classifier.train()
+        if trained:
+            print(f"Pre-classifier trained. Time elapsed: {time.time() - start_time:.2f}s")
+
+    # 回填模式按日期区间通过export API检索，否则读取各分类的 /recent 列表页
+    backfill_range = None
+    if args.backfill_from:
+        backfill_range = (args.backfill_from, args.backfill_to or date.today())
+
+    date_range = tuple(day.isoformat() for day in backfill_range) if backfill_range else None
+    sinks = build_sinks(config, date_range)
+    # 服务模式在内存中保留最近的结果供HTTP查询，启动时从JSONL输出恢复
+    results = None
+    if args.serve:
+        results = LatestResults(
+            max_papers=service_config.get('max_papers', 5000),
+            jsonl_path=config['output'].get('jsonl_path')
+        )
+        sinks.append(results)
+    output = MultiSink(sinks)
+
+    # 检查点日志记录每篇论文的各阶段结果，--resume 时跳过已完成的工作；
+    # 服务模式下每轮都重新读取列表页，已处理的论文由服务自己记录，不使用检查点
+    journal = None
+    checkpoint_path = config.get('checkpoint', {}).get('path')
+    if checkpoint_path and not args.serve:
+        journal = CheckpointJournal(checkpoint_path, resume=args.resume)
+        if args.resume:
+            print(f"Resuming from checkpoint: {journal.summary()}")
+    elif args.resume:
+        print("No checkpoint path configured, starting from scratch")
+
+    # 抓取、翻译和分类以流水线方式进行，论文抓到即开始处理
+    pipeline_config = config.get('pipeline', {})
+    pipeline = StreamingPipeline(
+        scraper,
+        translator,
+        classifier,
+        queue_size=pipeline_config.get('queue_size', 200),
+        batch_size=pipeline_config.get('batch_size', 20),
+        batch_timeout=pipeline_config.get('batch_timeout', 0.5),
+        workers=pipeline_config.get('workers', 4),
+        category_workers=config['arxiv'].get('fetch_workers', 4),
+        journal=journal,
+        pre_classifier=pre_classifier,
+        metrics=metrics
+    )
+    def run_summary(total, completed):
+        return {
+            'run': {
+                'started_at': start_time,
+                'finished_at': time.time(),
+                'duration_seconds': time.time() - start_time,
+                'papers': total,
+                'completed': completed
+            },
+            'response_cache': response_cache.stats() if response_cache is not None else {},
+            'http_cache': http_cache.stats() if http_cache is not None else {},
+            'pre_classifier': pre_classifier.stats() if pre_classifier else {},
+            'api': {
+                'retries': controller.retries,
+                'failures': controller.failures,
+                'concurrency_limit': controller.limiter.limit
+            },
+            'tokens': token_usage.stats()
+        }
+
+    def write_reports(total, completed):
+        if metrics_config.get('report_path'):
+            metrics.write_json(metrics_config['report_path'], run_summary(total, completed))
+        if metrics_config.get('prometheus_path'):
+            metrics.write_prometheus(metrics_config['prometheus_path'], run_summary(total, completed))
+
+    async def serve():
+        service = PollingService(
+            pipeline,
+            output,
+            config['arxiv']['categories'],
+            config['arxiv']['max_papers'],
+            interval=service_config.get('interval_minutes', 30) * 60,
+            seen_ids=results.ids(),
+            token_usage=token_usage,
+            metrics=metrics,
+            # 每轮结束写出报告，run.papers为本轮的新论文数
+            on_poll=lambda: write_reports(service.last_poll['papers'], service.last_poll['error'] is None)
+        )
+        server = ResultsServer(
+            service_config.get('host', '127.0.0.1'),
+            service_config.get('port', 8765),
+            results,
+            service.status,
+            lambda: metrics.render_prometheus(run_summary(service.last_poll.get('papers', 0), True))
+        ).start()
+        print(f"Serving results on http://{server.server_address[0]}:{server.server_address[1]}, "
+              f"polling every {service.interval / 60:g} minutes")
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, service.stop)
+        try:
+            return await service.serve()
+        finally:
+            server.stop()
+
+    print(f"Fetching and processing papers... Time elapsed: {time.time() - start_time:.2f}s")
+    async def run_pipeline():
+        try:
+            if args.serve:
+                return await serve()
+            if backfill_range:
+                backfill_config = config['arxiv'].get('backfill', {})
+                backfill = ArxivBackfill(
+                    base_url=config['arxiv'].get('base_url', 'https://arxiv.org'),
+                    export_url=config['arxiv'].get('export_url', 'http://export.arxiv.org/api/query'),
+                    rate_limit=config['arxiv'].get('export_rate_limit', 1 / 3),
+                    workers=backfill_config.get('workers', 4),
+                    window_days=backfill_config.get('window_days', 7),
+                    page_size=backfill_config.get('page_size', 1000)
+                )
+                return await pipeline.run_backfill(
+                    backfill, config['arxiv']['categories'], *backfill_range, output.add
+                )
+            return await pipeline.run(
+                config['arxiv']['categories'],
+                config['arxiv']['max_papers'],
+                output.add
+            )
+        finally:
+            # 在事件循环关闭前释放连接，否则回收时会报 Event loop is closed
+            await translator.ai_client.close()
+            await classifier.ai_client.close()
+
+    completed = False
+    total = 0
     try:
-        # 使用线程池并发处理论文
-        with ThreadPoolExecutor(max_workers=16) as executor:
-            results = list(executor.map(lambda paper: process_paper(paper, translator, classifier), formatted_papers))
-        
-        print(f"Processing completed. Time elapsed: {time.time() - start_time:.2f}s")
-        # 处理结果
-        for translated_paper, categories_list in results:
-            if translated_paper and categories_list:
-                for category in categories_list:
-                    if category not in categories:
-                        categories[category] = []
-                    categories[category].append(translated_paper)
+        total = asyncio.run(run_pipeline())
+        print(f"Processed {total} papers. Time elapsed: {time.time() - start_time:.2f}s")
+        # 常驻服务中失败的论文在下一轮重试；单次运行有论文、列表页或回填区间失败时保留检查点
+        completed = args.serve or (
+            pipeline.failed == 0 and pipeline.listing_errors == 0 and pipeline.shard_errors == 0
+        )
     except Exception as e:
         print(f"Error during processing: {e}")
         exit(1)
-        
-    # Use MarkdownWriter instead of direct markdown generation
-    writer = MarkdownWriter(config['output']['file_path'])
-    writer.write_papers(categories, config)
+    finally:
+        # 即使中途失败也保留已处理完的论文
+        output.close()
+        if journal:
+            journal.close(completed=completed)
+        # 失败的运行也写报告，便于定位是哪个阶段出了问题
+        write_reports(total, completed)
+
+    if paper_cache is not None:
+        paper_cache.close()
+    if http_cache is not None:
+        stats = http_cache.stats()
+        print(f"HTTP cache: {stats['not_modified']} not modified, {stats['fresh']} fresh, {stats['stored']} stored")
+        http_cache.close()
+    if response_cache is not None:
+        stats = response_cache.stats()
+        print(f"Response cache: {stats['hits']} hits, {stats['misses']} misses")
+        response_cache.close()
+    if pre_classifier:
+        stats = pre_classifier.stats()
+        print(f"Pre-classifier: {stats['rules']} by rules, {stats['model']} by model, "
+              f"{stats['escalated']} sent to LLM")
+    if config['api']['use_ai']:
+        print(f"API: {controller.retries} retries, {controller.failures} failed requests, "
+              f"final concurrency limit {controller.limiter.limit:.1f}")
+        stats = token_usage.stats()
+        print(f"Tokens: {stats['prompt_tokens']} prompt (estimated {stats['estimated_prompt_tokens']}), "
+              f"{stats['completion_tokens']} completion over {stats['requests']} requests, "
+              f"{stats['cached']} cached, {stats['rejected']} rejected by budget")
+    if not completed:
+        print(f"{pipeline.failed} papers, {pipeline.listing_errors} category listings and "
+              f"{pipeline.shard_errors} backfill shards failed, run again with --resume to retry them")
+        exit(1)
     
     print(f"All done! Total time elapsed: {time.time() - start_time:.2f}s")
 
@@ -1,5 +1,14 @@
 from datetime import datetime, timezone, timedelta
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import json
+import os
+import re
+import shutil
+from sinks.structured import PaperSink
+from url_tools.paper import Paper
+
+ENTRY_URL_PATTERN = re.compile(r'^- \[.*\]\((\S+)\)$')
 
 class MarkdownWriter:
     def __init__(self, output_path: str):
@@ -45,3 +54,224 @@ class MarkdownWriter:
         abstract_lines = abstract.split('\n')
         for line in abstract_lines:
             markdown_output.append(f"  > {line}")
+
+
+class IncrementalMarkdownWriter(MarkdownWriter, PaperSink):
+    def __init__(
+        self,
+        output_path: str,
+        config: dict,
+        merge: bool = True,
+        flush_every: int = 50,
+        date_range: Optional[Tuple[str, str]] = None
+    ):
+        """
+        Incrementally write papers to a markdown file, merging with previous runs
+
+        Args:
+            output_path: Path of the markdown file
+            config: Configuration dictionary containing arxiv settings
+            merge: Keep papers already present in output_path instead of starting over
+            flush_every: Number of added papers between appends to the per-section segment files
+            date_range: (start, end) dates for the header, e.g. of a backfill; defaults to the last arxiv.days days
+
+        New entries are appended to one segment file per section in output_path.parts/,
+        so a flush costs only the entries it writes. The segments are stitched into
+        output_path with a single atomic rewrite on commit and close.
+        """
+        super().__init__(output_path)
+        self.index_path = f"{output_path}.index.json"
+        self.parts_dir = f"{output_path}.parts"
+        self.flush_every = flush_every
+        now = datetime.now(timezone.utc)
+        self.end_date = now.strftime('%Y-%m-%d')
+        self.start_date = (now - timedelta(days=config['arxiv']['days'])).strftime('%Y-%m-%d')
+        # Without an explicit range the header follows the wall clock, so a long-running service keeps it current
+        self.rolling = not date_range
+        if date_range:
+            self.start_date, self.end_date = date_range
+        # category -> {'offset', 'length'}: location of the section in the current file
+        self.sections: Dict[str, dict] = {}
+        # category -> URLs already written or pending, used for deduplication
+        self.urls: Dict[str, set] = {}
+        # category -> papers not yet written to disk; entries are rendered at flush,
+        # so a paper in several categories is held once, by reference
+        self.pending: Dict[str, List[Paper]] = {}
+        self.pending_count = 0
+        # category -> segment file holding flushed entries not yet stitched into output_path
+        self.segments: Dict[str, str] = {}
+        if merge and os.path.exists(output_path):
+            self._load_index()
+        if merge:
+            self._load_segments()
+        else:
+            shutil.rmtree(self.parts_dir, ignore_errors=True)
+
+    def add(self, paper: Paper, categories: List[str]) -> None:
+        """
+        Add a processed paper to each of its categories, skipping URLs already present
+
+        Args:
+            paper: Processed paper; the translated title and abstract are written when present
+            categories: Categories the paper belongs to
+        """
+        for category in categories:
+            self.sections.setdefault(category, {'offset': 0, 'length': 0})
+            urls = self.urls.setdefault(category, set())
+            if paper['url'] in urls:
+                continue
+            urls.add(paper['url'])
+            self.pending.setdefault(category, []).append(paper)
+            self.pending_count += 1
+        if self.pending_count >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Append pending entries to their section's segment file; output_path is not touched
+        """
+        if not self.pending_count:
+            return
+        os.makedirs(self.parts_dir, exist_ok=True)
+        for category, papers in self.pending.items():
+            path = self.segments.get(category)
+            if path is None:
+                # The sequence number keeps new sections in order when segments are recovered
+                name = f"{len(self.segments):04d}-{hashlib.sha1(category.encode('utf-8')).hexdigest()}.md"
+                path = self.segments[category] = os.path.join(self.parts_dir, name)
+            with open(path, 'a', encoding='utf-8') as f:
+                if not f.tell():
+                    # The heading names the section when segments are recovered after a crash
+                    f.write(f"## {category}\n")
+                f.write("".join(self._render_entry(paper) for paper in papers))
+        self.pending = {}
+        self.pending_count = 0
+
+    def commit(self) -> None:
+        """
+        Rewrite the file atomically: existing sections are copied byte for byte from
+        the current file, followed by their segment files and any pending entries
+        """
+        if self.rolling:
+            self.end_date = max(self.end_date, datetime.now(timezone.utc).strftime('%Y-%m-%d'))
+        header = f"# ArXiv Papers\nDate range: {self.start_date} to {self.end_date}\n\n".encode('utf-8')
+        old_file = open(self.output_path, 'rb') if os.path.exists(self.output_path) else None
+        tmp_path = f"{self.output_path}.tmp"
+        try:
+            with open(tmp_path, 'wb') as tmp:
+                tmp.write(header)
+                for category, section in self.sections.items():
+                    offset = tmp.tell()
+                    if section['length'] and old_file:
+                        old_file.seek(section['offset'])
+                        content = old_file.read(section['length'])
+                        tmp.write(content)
+                        if not content.endswith(b"\n\n"):
+                            # Files written by write_papers end without a trailing blank line
+                            tmp.write(b"\n")
+                    else:
+                        tmp.write(f"\n## {category}\n".encode('utf-8'))
+                    if category in self.segments:
+                        with open(self.segments[category], 'rb') as segment:
+                            segment.readline()
+                            shutil.copyfileobj(segment, tmp)
+                    for paper in self.pending.get(category, []):
+                        tmp.write(self._render_entry(paper).encode('utf-8'))
+                    section['offset'] = offset
+                    section['length'] = tmp.tell() - offset
+                size = tmp.tell()
+        finally:
+            if old_file:
+                old_file.close()
+        os.replace(tmp_path, self.output_path)
+        self._write_index(size)
+        shutil.rmtree(self.parts_dir, ignore_errors=True)
+        self.segments = {}
+        self.pending = {}
+        self.pending_count = 0
+
+    def close(self) -> None:
+        self.commit()
+
+    def _render_entry(self, paper: Paper) -> str:
+        lines = [f"- [{paper.get('title_zh') or paper['title']}]({paper['url']})"]
+        self._add_abstract_lines(lines, paper.get('abstract_zh') or paper['abstract'])
+        return "\n".join(lines) + "\n\n"
+
+    def _write_index(self, size: int) -> None:
+        index = {
+            'start_date': self.start_date,
+            'end_date': self.end_date,
+            'size': size,
+            'sections': self.sections,
+            'urls': {category: sorted(urls) for category, urls in self.urls.items()}
+        }
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    def _load_index(self) -> None:
+        size = os.path.getsize(self.output_path)
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            # The index is only trusted if it describes the file on disk
+            if index.get('size') == size:
+                self.sections = index['sections']
+                self.urls = {category: set(urls) for category, urls in index['urls'].items()}
+                self.start_date = min(self.start_date, index['start_date'])
+                self.end_date = max(self.end_date, index.get('end_date', self.end_date))
+                return
+        self._scan_existing()
+
+    def _load_segments(self) -> None:
+        """
+        Pick up segment files left by a run that stopped before stitching them in.
+        A segment whose first entry is already in its section was stitched, and is dropped
+        """
+        if not os.path.isdir(self.parts_dir):
+            return
+        for name in sorted(os.listdir(self.parts_dir)):
+            path = os.path.join(self.parts_dir, name)
+            with open(path, 'r', encoding='utf-8') as f:
+                heading = f.readline().rstrip('\n')
+                urls = [match.group(1) for match in map(ENTRY_URL_PATTERN.match, f) if match]
+            if not heading.startswith('## ') or not urls or urls[0] in self.urls.get(heading[3:], ()):
+                os.remove(path)
+                continue
+            category = heading[3:]
+            self.sections.setdefault(category, {'offset': 0, 'length': 0})
+            self.urls.setdefault(category, set()).update(urls)
+            self.segments[category] = path
+
+    def _scan_existing(self) -> None:
+        """
+        Rebuild the index from the markdown itself when the sidecar is missing or stale
+        """
+        self.sections = {}
+        self.urls = {}
+        section = None
+        category = None
+        offset = 0
+        with open(self.output_path, 'rb') as f:
+            for raw_line in f:
+                line = raw_line.decode('utf-8').rstrip('\n')
+                if line.startswith('Date range: '):
+                    self.start_date = min(self.start_date, line.split()[2])
+                    self.end_date = max(self.end_date, line.split()[-1])
+                elif line.startswith('## '):
+                    # The blank line preceding the heading belongs to the new section
+                    if section is not None:
+                        section['length'] = offset - 1 - section['offset']
+                    category = line[3:]
+                    section = {'offset': offset - 1, 'length': 0}
+                    self.sections[category] = section
+                    self.urls[category] = set()
+                elif section is not None:
+                    match = ENTRY_URL_PATTERN.match(line)
+                    if match:
+                        self.urls[category].add(match.group(1))
+                offset += len(raw_line)
+        if section is not None:
+            section['length'] = offset - section['offset']
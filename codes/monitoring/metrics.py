@@ -0,0 +1,162 @@
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+import json
+import math
+import os
+import re
+import threading
+import time
+
+QUANTILES = (0.5, 0.9, 0.99)
+METRIC_NAME_PATTERN = re.compile(r'[^a-zA-Z0-9_]')
+
+
+def percentile(values: List[float], quantile: float) -> float:
+    """最近秩法计算分位数，values需已排序"""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(quantile * len(values)) - 1)]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """把一组耗时汇总为次数、总和、均值、分位数和最大值"""
+    values = sorted(values)
+    summary = {
+        'count': len(values),
+        'sum': sum(values),
+        'mean': sum(values) / len(values) if values else 0.0,
+        'max': values[-1] if values else 0.0
+    }
+    for quantile in QUANTILES:
+        summary[f'p{int(quantile * 100)}'] = percentile(values, quantile)
+    return summary
+
+
+def _atomic_write(path: str, content: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def _flatten(data: Dict[str, Any], prefix: str = '') -> Iterator:
+    """展开嵌套字典中的数值，键用下划线连接"""
+    for key, value in data.items():
+        name = f"{prefix}_{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            yield from _flatten(value, name)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, value
+        elif isinstance(value, bool):
+            yield name, int(value)
+
+
+class Metrics:
+    def __init__(self, max_samples: Optional[int] = None):
+        """
+        线程安全的运行指标：计数器、耗时分布和队列深度等瞬时值，
+        可导出为JSON运行报告或Prometheus textfile
+
+        Args:
+            max_samples: 每项耗时最多保留的样本数，分位数和最大值按最近的样本计算，
+                次数、总和和均值仍按全部样本累计；常驻服务用它限制内存，为空时保留全部样本
+        """
+        self.counters: Dict[str, float] = defaultdict(float)
+        self.timings: Dict[str, deque] = defaultdict(lambda: deque(maxlen=max_samples))
+        # name -> [次数, 总和]
+        self.timing_totals: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0])
+        self.gauges: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] += value
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.timings[name].append(seconds)
+            totals = self.timing_totals[name]
+            totals[0] += 1
+            totals[1] += seconds
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """记录瞬时值，同时保留运行期间的最大值"""
+        with self._lock:
+            gauge = self.gauges.setdefault(name, {'last': value, 'max': value})
+            gauge['last'] = value
+            gauge['max'] = max(gauge['max'], value)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """记录with块的耗时（秒）"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            timings = {}
+            for name, values in self.timings.items():
+                count, total = self.timing_totals[name]
+                timings[name] = {**summarize(values), 'count': count, 'sum': total, 'mean': total / count}
+            return {
+                'counters': dict(self.counters),
+                'timings': timings,
+                'gauges': {name: dict(gauge) for name, gauge in self.gauges.items()}
+            }
+
+    def write_json(self, path: str, extra: Optional[Dict[str, Any]] = None) -> None:
+        """
+        写入JSON运行报告
+
+        Args:
+            path: 报告文件路径
+            extra: 合并到报告顶层的其他信息，如运行时长、缓存和token统计
+        """
+        report = dict(extra or {})
+        report['metrics'] = self.report()
+        _atomic_write(path, json.dumps(report, ensure_ascii=False, indent=2))
+
+    def write_prometheus(self, path: str, extra: Optional[Dict[str, Any]] = None, prefix: str = 'arxiv_daily') -> None:
+        """
+        写入Prometheus textfile（供node_exporter的textfile collector读取），原子替换避免读到半个文件
+
+        Args:
+            path: 输出文件路径，通常以 .prom 结尾
+            extra: 其他数值信息，展开后作为gauge输出
+            prefix: 指标名前缀
+        """
+        _atomic_write(path, self.render_prometheus(extra, prefix))
+
+    def render_prometheus(self, extra: Optional[Dict[str, Any]] = None, prefix: str = 'arxiv_daily') -> str:
+        """
+        按Prometheus文本格式输出全部指标，参数同write_prometheus
+        """
+        def metric_name(name: str) -> str:
+            return METRIC_NAME_PATTERN.sub('_', f"{prefix}_{name}")
+
+        report = self.report()
+        lines = []
+        for name, value in sorted(report['counters'].items()):
+            name = metric_name(name)
+            lines += [f"# TYPE {name}_total counter", f"{name}_total {value}"]
+        for name, summary in sorted(report['timings'].items()):
+            name = metric_name(name)
+            lines.append(f"# TYPE {name} summary")
+            for quantile in QUANTILES:
+                lines.append(f'{name}{{quantile="{quantile}"}} {summary[f"p{int(quantile * 100)}"]}')
+            lines += [f"{name}_sum {summary['sum']}", f"{name}_count {summary['count']}"]
+        for name, gauge in sorted(report['gauges'].items()):
+            name = metric_name(name)
+            lines += [f"# TYPE {name} gauge", f"{name} {gauge['last']}",
+                      f"# TYPE {name}_max gauge", f"{name}_max {gauge['max']}"]
+        for name, value in _flatten(extra or {}):
+            name = metric_name(name)
+            lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+        return '\n'.join(lines) + '\n'
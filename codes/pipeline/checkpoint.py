@@ -0,0 +1,86 @@
+import json
+import os
+import threading
+from typing import Any, Dict, Optional, Set
+from url_tools.paper import to_json
+
+# 各阶段的记录：listing按分类记录列表页结果，其余按论文ID记录
+STAGES = ('listing', 'scrape', 'translate', 'classify')
+
+
+class CheckpointJournal:
+    def __init__(self, path: str, resume: bool = False):
+        """
+        追加写入的检查点日志，记录每篇论文各阶段的结果，中断后可从中恢复
+
+        Args:
+            path: 日志文件路径（JSON Lines）
+            resume: 为True时加载已有日志并继续追加，否则清空重新开始
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        # 内存中只保留各阶段已完成的键；结果只写入磁盘，否则回填中已处理完的论文连同译文无法释放
+        self.completed: Dict[str, Set[str]] = {stage: set() for stage in STAGES}
+        # 从日志恢复、尚未被取走的结果，只在 --resume 时加载
+        self.records: Dict[str, Dict[str, Any]] = {stage: {} for stage in STAGES}
+        self._lock = threading.Lock()
+        if resume and os.path.exists(path):
+            self._load()
+        self._file = open(path, 'a' if resume else 'w', encoding='utf-8')
+
+    def _load(self) -> None:
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 进程被杀时最后一行可能只写了一半
+                    continue
+                self.completed[record['stage']].add(record['key'])
+                self.records[record['stage']][record['key']] = record['data']
+
+    def has(self, stage: str, key: str) -> bool:
+        """该阶段是否已记录过key的结果（包括从日志恢复的和本次运行写入的）"""
+        return key in self.completed[stage]
+
+    def pop(self, stage: str, key: str) -> Optional[Any]:
+        """
+        取走从日志恢复的结果并释放内存中的副本，每个结果只能取走一次
+
+        Returns:
+            恢复的结果；本次运行中写入的结果不在内存中保留，返回None
+        """
+        with self._lock:
+            return self.records[stage].pop(key, None)
+
+    def record(self, stage: str, key: str, data: Any) -> None:
+        """
+        记录一个已完成的结果并立即写入磁盘
+
+        Args:
+            stage: 阶段名，见STAGES
+            key: 分类名或论文ID
+            data: 该阶段的结果，需可JSON序列化；Paper按字典写入。结果只写入磁盘，内存中只记录key
+        """
+        line = json.dumps({'stage': stage, 'key': key, 'data': data}, ensure_ascii=False, default=to_json)
+        with self._lock:
+            self.completed[stage].add(key)
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def summary(self) -> Dict[str, int]:
+        return {stage: len(keys) for stage, keys in self.completed.items()}
+
+    def close(self, completed: bool = False) -> None:
+        """
+        关闭日志；运行成功完成时删除日志，避免下次 --resume 误用
+
+        Args:
+            completed: 本次运行是否已全部完成
+        """
+        with self._lock:
+            self._file.close()
+        if completed:
+            os.remove(self.path)
@@ -0,0 +1,309 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qs, unquote, urlparse
+from pipeline.stream import StreamingPipeline
+from sinks.structured import PaperSink, paper_record
+from url_tools.arxiv_abstracts import strip_version
+from url_tools.paper import Paper
+from bytedance_ai_tools.token_budget import TokenUsage
+from monitoring.metrics import Metrics
+
+
+class LatestResults(PaperSink):
+    def __init__(self, max_papers: int = 5000, jsonl_path: Optional[str] = None):
+        """
+        常驻服务在内存中保留的最近处理结果，供HTTP接口查询
+
+        Args:
+            max_papers: 最多保留的论文数，超出时淘汰最早加入的
+            jsonl_path: 可选的JsonlSink输出文件，启动时从末尾载入最近的结果，重启后无需重新处理
+        """
+        self.max_papers = max_papers
+        # id -> paper_record，按加入顺序排列
+        self.records: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._lock = threading.Lock()
+        if jsonl_path and os.path.exists(jsonl_path):
+            self._load(jsonl_path)
+
+    def _load(self, path: str) -> None:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self._put(record)
+
+    def _put(self, record: Dict) -> None:
+        self.records.pop(record['id'], None)
+        self.records[record['id']] = record
+        while len(self.records) > self.max_papers:
+            self.records.popitem(last=False)
+
+    def add(self, paper: Paper, categories: List[str]) -> None:
+        record = paper_record(paper, categories)
+        record['processed_at'] = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        with self._lock:
+            self._put(record)
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return [strip_version(paper_id) for paper_id in self.records]
+
+    def get(self, paper_id: str) -> Optional[Dict]:
+        with self._lock:
+            return self.records.get(paper_id) or self.records.get(strip_version(paper_id))
+
+    def query(self, category: Optional[str] = None, since: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """
+        按处理时间从新到旧返回结果
+
+        Args:
+            category: 只返回属于该分类的论文
+            since: 只返回date不早于该日期（YYYY-MM-DD）的论文
+            limit: 最多返回的论文数
+        """
+        results = []
+        with self._lock:
+            for record in reversed(self.records.values()):
+                if len(results) >= limit:
+                    break
+                if category and category not in record['categories']:
+                    continue
+                if since and record['date'] < since:
+                    continue
+                results.append(record)
+        return results
+
+    def category_counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        with self._lock:
+            for record in self.records.values():
+                for category in record['categories']:
+                    counts[category] = counts.get(category, 0) + 1
+        return counts
+
+
+class ResultsHandler(BaseHTTPRequestHandler):
+    """
+    GET /papers?category=&since=&limit=   最近处理的论文，从新到旧
+    GET /papers/<id>                      单篇论文
+    GET /health                           服务状态和各分类论文数
+    GET /metrics                          Prometheus文本格式的运行指标
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: str, content_type: str = 'application/json; charset=utf-8') -> None:
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, status: int, data: Any) -> None:
+        self._send(status, json.dumps(data, ensure_ascii=False))
+
+    def do_GET(self):
+        server: ResultsServer = self.server
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        path = url.path.rstrip('/')
+        if path == '/papers':
+            try:
+                limit = min(int(query.get('limit', ['50'])[0]), server.results.max_papers)
+            except ValueError:
+                self._send_json(400, {'error': 'limit must be an integer'})
+                return
+            papers = server.results.query(
+                category=query.get('category', [None])[0],
+                since=query.get('since', [None])[0],
+                limit=limit
+            )
+            self._send_json(200, {'count': len(papers), 'papers': papers})
+        elif path.startswith('/papers/'):
+            record = server.results.get(unquote(path[len('/papers/'):]))
+            if record is None:
+                self._send_json(404, {'error': 'paper not found'})
+            else:
+                self._send_json(200, record)
+        elif path == '/health':
+            self._send_json(200, {**server.status(), 'categories': server.results.category_counts()})
+        elif path == '/metrics':
+            self._send(200, server.metrics_text(), 'text/plain; version=0.0.4; charset=utf-8')
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+
+class ResultsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        results: LatestResults,
+        status: Callable[[], Dict],
+        metrics_text: Callable[[], str]
+    ):
+        """
+        在后台线程中提供查询接口的HTTP服务器
+
+        Args:
+            host: 监听地址，默认只监听本机
+            port: 监听端口，0表示随机端口
+            results: 查询的结果集
+            status: 返回服务状态字典的函数
+            metrics_text: 返回Prometheus文本的函数
+        """
+        super().__init__((host, port), ResultsHandler)
+        self.results = results
+        self.status = status
+        self.metrics_text = metrics_text
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'ResultsServer':
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class PollingService:
+    def __init__(
+        self,
+        pipeline: StreamingPipeline,
+        output: PaperSink,
+        categories: List[str],
+        max_results: Optional[int],
+        interval: float = 1800,
+        seen_ids: Optional[List[str]] = None,
+        max_seen: int = 100000,
+        token_usage: Optional[TokenUsage] = None,
+        metrics: Optional[Metrics] = None,
+        on_poll: Optional[Callable[[], None]] = None
+    ):
+        """
+        常驻服务：按固定间隔轮询各分类的列表页，只处理没见过的论文。
+        抓取器的HTTP连接、论文和响应缓存、LLM客户端及其并发控制器、本地预分类器在各轮之间复用
+
+        Args:
+            pipeline: 流式管线，每轮调用一次run
+            output: 输出端，每轮结束时commit
+            categories: 要轮询的arXiv分类列表
+            max_results: 每个分类最多抓取的论文数
+            interval: 两轮开始之间的间隔（秒）
+            seen_ids: 已处理过的论文ID，如重启前的结果
+            max_seen: 记住的已处理ID数，超出时忘记最早的；应大于列表页上的论文数
+            token_usage: token统计，每轮开始时重置，max_run_tokens即为每轮的预算
+            metrics: 运行指标
+            on_poll: 每轮结束后调用，如写出运行报告
+        """
+        self.pipeline = pipeline
+        self.output = output
+        self.categories = categories
+        self.max_results = max_results
+        self.interval = interval
+        self.max_seen = max_seen
+        self.token_usage = token_usage
+        self.metrics = metrics or Metrics()
+        self.on_poll = on_poll
+        # 已成功处理的论文ID（不含版本号），按加入顺序淘汰；处理失败的论文下一轮重试
+        self.seen: Dict[str, None] = dict.fromkeys(seen_ids or [])
+        self.polls = 0
+        self.errors = 0
+        self.started_at = time.time()
+        self.last_poll: Dict[str, Any] = {}
+        self.next_poll_at: Optional[float] = None
+        self._stopping: Optional[asyncio.Event] = None
+
+    def _on_result(self, paper: Paper, categories: List[str]) -> None:
+        self.output.add(paper, categories)
+        self.seen[strip_version(paper.id)] = None
+        while len(self.seen) > self.max_seen:
+            del self.seen[next(iter(self.seen))]
+
+    async def poll_once(self) -> int:
+        """
+        运行一轮：抓取列表页、处理新论文、提交输出
+
+        Returns:
+            本轮处理的新论文数，失败时为0
+        """
+        if self.token_usage:
+            self.token_usage.reset()
+        started = time.time()
+        processed = 0
+        error = None
+        try:
+            processed = await self.pipeline.run(
+                self.categories, self.max_results, self._on_result, skip_ids=self.seen
+            )
+        except Exception as e:
+            error = str(e)
+            self.errors += 1
+            self.metrics.incr('service_poll_errors')
+            print(f"Error during poll: {e}")
+        finally:
+            self.output.commit()
+            self.polls += 1
+            self.metrics.incr('service_polls')
+            self.metrics.observe('service_poll_seconds', time.time() - started)
+            self.last_poll = {
+                'started_at': started,
+                'finished_at': time.time(),
+                'papers': processed,
+                'error': error
+            }
+        if self.on_poll:
+            self.on_poll()
+        return processed
+
+    async def serve(self) -> int:
+        """
+        轮询直到stop被调用；正在进行的一轮会先完成
+
+        Returns:
+            各轮处理的新论文总数
+        """
+        self._stopping = asyncio.Event()
+        total = 0
+        while not self._stopping.is_set():
+            start = time.time()
+            processed = await self.poll_once()
+            total += processed
+            print(f"Poll {self.polls}: {processed} new papers in {time.time() - start:.2f}s")
+            self.next_poll_at = start + self.interval
+            try:
+                await asyncio.wait_for(self._stopping.wait(), max(0.0, self.next_poll_at - time.time()))
+            except asyncio.TimeoutError:
+                pass
+        self.next_poll_at = None
+        return total
+
+    def stop(self) -> None:
+        if self._stopping is not None:
+            self._stopping.set()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'started_at': self.started_at,
+            'polls': self.polls,
+            'errors': self.errors,
+            'last_poll': self.last_poll,
+            'next_poll_at': self.next_poll_at,
+            'seen_papers': len(self.seen)
+        }
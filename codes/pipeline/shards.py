@@ -0,0 +1,344 @@
+import copy
+import json
+import os
+import socket
+import subprocess
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+import yaml
+from pipeline.checkpoint import CheckpointJournal
+from sinks.structured import PaperSink, paper_from_record
+from url_tools.arxiv_latest import ArxivWebScraper
+from url_tools.dedup import PaperDeduplicator
+from url_tools.paper import to_json
+
+# 任务文件所在的子目录，任务通过在子目录间原子改名转移状态
+TASK_STATES = ('pending', 'claimed', 'done', 'failed')
+
+
+def _write_json(path: str, data: Dict) -> None:
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, default=to_json)
+    os.replace(tmp_path, path)
+
+
+class WorkQueue:
+    def __init__(self, root: str, lease_seconds: float = 3600, max_attempts: int = 3):
+        """
+        基于共享文件系统的任务队列，可供多台机器上的worker同时领取任务。
+        每个任务是一个JSON文件，领取即把文件从pending/改名到claimed/，改名是原子的，
+        同一任务只会被一个worker领到；worker定期更新文件的修改时间作为心跳
+
+        Args:
+            root: 队列目录
+            lease_seconds: 心跳超过该时长未更新的任务视为worker已退出，重新放回pending
+            max_attempts: 任务失败的最多次数，超过后移入failed/
+        """
+        self.root = root
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        for state in TASK_STATES + ('results',):
+            os.makedirs(os.path.join(root, state), exist_ok=True)
+
+    def _path(self, state: str, task_id: str) -> str:
+        return os.path.join(self.root, state, f"{task_id}.json")
+
+    def task_ids(self, state: str) -> List[str]:
+        return sorted(name[:-5] for name in os.listdir(os.path.join(self.root, state)) if name.endswith('.json'))
+
+    def counts(self) -> Dict[str, int]:
+        return {state: len(self.task_ids(state)) for state in TASK_STATES}
+
+    def result_dir(self, task_id: str) -> str:
+        path = os.path.join(self.root, 'results', task_id)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def enqueue(self, task: Dict) -> None:
+        task.setdefault('attempts', 0)
+        _write_json(self._path('pending', task['id']), task)
+
+    def claim(self) -> Optional[Dict]:
+        """
+        领取一个待处理的任务
+
+        Returns:
+            任务字典，没有待处理任务时为None
+        """
+        self.requeue_stale()
+        for task_id in self.task_ids('pending'):
+            claimed_path = self._path('claimed', task_id)
+            try:
+                os.rename(self._path('pending', task_id), claimed_path)
+            except FileNotFoundError:
+                # 被其他worker抢先领取
+                continue
+            # 改名保留原修改时间，领取时重新开始计算租期
+            os.utime(claimed_path)
+            with open(claimed_path, 'r', encoding='utf-8') as f:
+                task = json.load(f)
+            # 每次领取的标记：租期过期后任务可能被放回并由其他worker重新领取，
+            # 原worker据此判断任务是否仍归自己
+            task['claim'] = uuid.uuid4().hex
+            _write_json(claimed_path, task)
+            return task
+        return None
+
+    def heartbeat(self, task_id: str) -> None:
+        try:
+            os.utime(self._path('claimed', task_id))
+        except FileNotFoundError:
+            pass
+
+    def _owns(self, task: Dict) -> bool:
+        """claimed/中的任务文件是否仍是本次领取的"""
+        try:
+            with open(self._path('claimed', task['id']), 'r', encoding='utf-8') as f:
+                return json.load(f).get('claim') == task.get('claim')
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False
+
+    def complete(self, task: Dict) -> bool:
+        """
+        把任务标记为完成
+
+        Returns:
+            是否由本次领取完成；租期过期后任务已被其他worker重新领取时返回False，由那个worker完成
+        """
+        if self._owns(task):
+            try:
+                os.replace(self._path('claimed', task['id']), self._path('done', task['id']))
+                return True
+            except FileNotFoundError:
+                pass
+        # 租期过期后任务被放回pending但还没有被重新领取：结果已完整写出，直接标记完成
+        try:
+            os.rename(self._path('pending', task['id']), self._path('done', task['id']))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def fail(self, task: Dict, error: str) -> Optional[str]:
+        """
+        记录一次失败，次数未超过max_attempts时放回pending
+
+        Returns:
+            任务的新状态；任务已不归本次领取（租期过期被放回或重新领取）时为None，不计入失败次数
+        """
+        if not self._owns(task):
+            return None
+        task['attempts'] = task.get('attempts', 0) + 1
+        task['error'] = error
+        task.pop('claim', None)
+        state = 'pending' if task['attempts'] < self.max_attempts else 'failed'
+        _write_json(self._path(state, task['id']), task)
+        try:
+            os.remove(self._path('claimed', task['id']))
+        except FileNotFoundError:
+            pass
+        return state
+
+    def requeue_stale(self) -> None:
+        deadline = time.time() - self.lease_seconds
+        for task_id in self.task_ids('claimed'):
+            path = self._path('claimed', task_id)
+            try:
+                if os.path.getmtime(path) < deadline:
+                    os.rename(path, self._path('pending', task_id))
+                    print(f"Requeued {task_id}: lease expired")
+            except FileNotFoundError:
+                continue
+
+
+def plan_shards(
+    scraper: ArxivWebScraper,
+    categories: List[str],
+    max_results: Optional[int],
+    shards: int
+) -> List[Dict]:
+    """
+    读取各分类的列表页并去重，把论文按顺序切分为论文数相近的shards个任务。
+    大分类会被拆到多个任务中，交叉投稿的论文只属于第一个列出它的分类，各任务之间没有重复工作
+
+    Args:
+        scraper: 论文抓取器
+        categories: arXiv分类列表
+        max_results: 每个分类最多抓取的论文数
+        shards: 任务数
+
+    Returns:
+        任务列表，每个任务的listing为 {分类: 论文列表}
+    """
+    deduplicator = PaperDeduplicator()
+    listings = []
+    for category in categories:
+        listing = scraper.get_listing(category, max_results)
+        added = deduplicator.add(listing)
+        print(f"Fetched {len(listing)} papers from {category}, {len(added)} new")
+        listings.append((category, added))
+    items = [(category, paper) for category, papers in listings for paper in papers]
+    per_shard = max(1, -(-len(items) // shards))
+    tasks = []
+    for offset in range(0, len(items), per_shard):
+        listing: Dict[str, list] = {}
+        for category, paper in items[offset:offset + per_shard]:
+            listing.setdefault(category, []).append(paper)
+        tasks.append({'id': f"shard-{len(tasks):04d}", 'listing': listing})
+    return tasks
+
+
+class ShardWorker:
+    def __init__(
+        self,
+        queue: WorkQueue,
+        config: Dict,
+        command: List[str],
+        processes: int = 4,
+        heartbeat_seconds: Optional[float] = None
+    ):
+        """
+        在本机领取并执行队列中的任务，每个任务在独立的子进程中运行完整的管线，
+        抓取、解析和LLM调用不再受同一个GIL和线程池限制
+
+        Args:
+            queue: 任务队列
+            config: 基础配置，每个任务在其上替换分类、输出和检查点路径
+            command: 启动管线的命令，如 [sys.executable, 'codes/main.py']
+            processes: 本机同时运行的任务数；arXiv限速按该数均分，本机合计速率不变
+            heartbeat_seconds: 心跳间隔，默认为租期的四分之一
+        """
+        self.queue = queue
+        self.config = config
+        self.command = command
+        self.processes = processes
+        self.heartbeat_seconds = heartbeat_seconds or queue.lease_seconds / 4
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}"
+        self.completed = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    def task_config(self, task: Dict, result_dir: str) -> Dict:
+        config = copy.deepcopy(self.config)
+        arxiv = config['arxiv']
+        arxiv['categories'] = list(task['listing'])
+        arxiv['rate_limit'] = arxiv.get('rate_limit', 1.0) / self.processes
+        arxiv['export_rate_limit'] = arxiv.get('export_rate_limit', 1 / 3) / self.processes
+        config['checkpoint'] = {'path': os.path.join(result_dir, 'checkpoint.jsonl')}
+        # 任务只写JSON Lines，由merge_results合并为最终的Markdown/JSONL/Parquet输出
+        config['output'].update({
+            'file_path': None,
+            'jsonl_path': os.path.join(result_dir, 'papers.jsonl'),
+            'parquet_dir': None,
+            'merge': True
+        })
+        config['metrics'] = {
+            'report_path': os.path.join(result_dir, 'run_report.json'),
+            'quiet': True
+        }
+        return config
+
+    def run_task(self, task: Dict) -> Optional[bool]:
+        """
+        执行一个任务：把规划时读取的列表页写入任务的检查点，再以 --resume 启动管线，
+        失败重试时已完成的摘要、翻译和分类直接从检查点恢复
+
+        Returns:
+            是否成功；任务在运行期间租期过期并已由其他worker重新领取时为None，不计入本机的完成或失败数
+        """
+        result_dir = self.queue.result_dir(task['id'])
+        journal = CheckpointJournal(os.path.join(result_dir, 'checkpoint.jsonl'), resume=True)
+        for category, papers in task['listing'].items():
+            if not journal.has('listing', category):
+                journal.record('listing', category, papers)
+        journal.close()
+        config_path = os.path.join(result_dir, 'config.yaml')
+        with open(config_path, 'w', encoding='utf-8') as f:
+            yaml.safe_dump(self.task_config(task, result_dir), f, allow_unicode=True)
+        with open(os.path.join(result_dir, 'worker.log'), 'a', encoding='utf-8') as log:
+            log.write(f"--- {self.worker_id} attempt {task.get('attempts', 0) + 1}\n")
+            log.flush()
+            process = subprocess.Popen(
+                self.command + ['--config', config_path, '--resume', '--quiet'],
+                stdout=log,
+                stderr=subprocess.STDOUT
+            )
+            while True:
+                try:
+                    returncode = process.wait(timeout=self.heartbeat_seconds)
+                    break
+                except subprocess.TimeoutExpired:
+                    self.queue.heartbeat(task['id'])
+        if returncode == 0:
+            if self.queue.complete(task):
+                return True
+            print(f"{task['id']} finished after its lease expired and was claimed again, "
+                  f"leaving it to the new claimant")
+            return None
+        state = self.queue.fail(task, f"exit status {returncode}, see {os.path.join(result_dir, 'worker.log')}")
+        if state is None:
+            print(f"{task['id']} failed with exit status {returncode} after its lease expired")
+        else:
+            print(f"{task['id']} failed with exit status {returncode}, moved to {state}")
+        return False
+
+    def _work(self) -> None:
+        while True:
+            task = self.queue.claim()
+            if task is None:
+                return
+            papers = sum(len(papers) for papers in task['listing'].values())
+            print(f"{self.worker_id}: running {task['id']} ({papers} papers)")
+            start = time.time()
+            ok = self.run_task(task)
+            with self._lock:
+                if ok:
+                    self.completed += 1
+                elif ok is False:
+                    self.failed += 1
+            if ok:
+                print(f"{self.worker_id}: finished {task['id']} in {time.time() - start:.1f}s")
+
+    def run(self) -> None:
+        """同时运行processes个任务，直到队列中没有待处理的任务"""
+        threads = [threading.Thread(target=self._work) for _ in range(self.processes)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+
+def merge_results(queue: WorkQueue, output: PaperSink) -> int:
+    """
+    把已完成任务的JSON Lines结果合并写入输出端，同一论文出现在多个任务中时合并其分类
+
+    Args:
+        queue: 任务队列
+        output: 最终输出端
+
+    Returns:
+        合并后的论文数
+    """
+    records: Dict[str, Dict] = {}
+    for task_id in queue.task_ids('done'):
+        path = os.path.join(queue.root, 'results', task_id, 'papers.jsonl')
+        if not os.path.exists(path):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                existing = records.get(record['id'])
+                if existing is None:
+                    records[record['id']] = record
+                    continue
+                for category in record['categories']:
+                    if category not in existing['categories']:
+                        existing['categories'].append(category)
+    for record in records.values():
+        output.add(paper_from_record(record), record['categories'])
+    return len(records)
@@ -0,0 +1,453 @@
+import asyncio
+import threading
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from typing import Awaitable, Callable, Container, List, Optional, Set
+from bytedance_ai_tools.bytedance_classifier import BytedanceClassifier
+from bytedance_ai_tools.bytedance_translator import BytedanceTranslator
+from url_tools.arxiv_latest import ArxivWebScraper
+from url_tools.arxiv_backfill import ArxivBackfill, fetch_shard
+from datetime import date
+from url_tools.arxiv_abstracts import strip_version
+from url_tools.dedup import PaperDeduplicator
+from url_tools.paper import Paper, as_paper
+from pipeline.checkpoint import CheckpointJournal
+from local_classifier.pre_classifier import PreClassifier
+from monitoring.metrics import Metrics
+import time
+
+# 队列结束标记
+_DONE = object()
+
+
+async def process_papers(
+    papers: List[Paper],
+    translator: BytedanceTranslator,
+    classifier: BytedanceClassifier,
+    journal: Optional[CheckpointJournal] = None,
+    pre_classifier: Optional[PreClassifier] = None
+) -> list:
+    """
+    在同一个事件循环中并发处理一批论文：分批翻译、分批分类，
+    在途请求数由客户端共享的ApiController控制。译文和分类结果直接写回传入的Paper，
+    不再为每篇论文复制一份字典
+
+    Args:
+        papers: Paper列表
+        translator: 翻译器实例
+        classifier: 分类器实例
+        journal: 可选的检查点日志，已记录的结果直接复用，新结果写入日志
+        pre_classifier: 可选的本地预分类器，有把握的论文不再交给LLM分类
+
+    Returns:
+        list: 与papers顺序一致的 (paper, categories_list) 列表，失败的论文为 (None, None)
+    """
+    translations, categories_by_id = {}, {}
+    if journal:
+        for paper in papers:
+            translation = journal.pop('translate', paper['id'])
+            if translation is not None:
+                translations[paper['id']] = translation
+            categories_list = journal.pop('classify', paper['id'])
+            if categories_list is not None:
+                categories_by_id[paper['id']] = categories_list
+    to_translate = [paper for paper in papers if paper['id'] not in translations]
+    to_classify = [paper for paper in papers if paper['id'] not in categories_by_id]
+    pre_classified = {}
+    # 取自按论文缓存的分类结果此前已记录为训练样本，不再重复记录
+    cached_ids = set()
+    if pre_classifier and classifier.ai_client.use_ai and to_classify:
+        pre_classified = pre_classifier.classify(to_classify)
+        to_classify = [paper for paper in to_classify if paper['id'] not in pre_classified]
+
+    async def translate():
+        if not to_translate:
+            return {}
+        try:
+            return await translator.translate_papers(to_translate)
+        except Exception as e:
+            print(f"Error translating papers: {e}")
+            return {}
+
+    async def classify():
+        if not classifier.ai_client.use_ai:
+            return {paper['id']: ["others"] for paper in to_classify}
+        if not to_classify:
+            return {}
+        try:
+            return await classifier.classify_papers(to_classify, cached_ids=cached_ids)
+        except Exception as e:
+            print(f"Error classifying papers: {e}")
+            return {}
+
+    new_translations, new_categories = await asyncio.gather(translate(), classify())
+    if pre_classifier and classifier.ai_client.use_ai:
+        # 只用LLM的结果作为训练数据，避免模型学习自己的预测
+        pre_classifier.record([paper for paper in to_classify if paper['id'] not in cached_ids], new_categories)
+    new_categories.update(pre_classified)
+    if journal:
+        for paper_id, translation in new_translations.items():
+            journal.record('translate', paper_id, translation)
+        for paper_id, categories_list in new_categories.items():
+            journal.record('classify', paper_id, categories_list)
+    translations.update(new_translations)
+    categories_by_id.update(new_categories)
+
+    results = []
+    for paper in papers:
+        translation = translations.get(paper['id'])
+        if translation is None:
+            results.append((None, None))
+            continue
+        paper.title_zh = translation['title']
+        paper.abstract_zh = translation['abstract']
+        categories_list = categories_by_id.get(paper['id'])
+        if categories_list:
+            paper.categories = categories_list
+        results.append((paper, categories_list))
+    return results
+
+
+class StreamingPipeline:
+    def __init__(
+        self,
+        scraper: ArxivWebScraper,
+        translator: BytedanceTranslator,
+        classifier: BytedanceClassifier,
+        queue_size: int = 200,
+        batch_size: int = 20,
+        batch_timeout: float = 0.5,
+        workers: int = 4,
+        category_workers: int = 4,
+        journal: Optional[CheckpointJournal] = None,
+        pre_classifier: Optional[PreClassifier] = None,
+        metrics: Optional[Metrics] = None
+    ):
+        """
+        抓取 -> 翻译/分类 -> 输出 的流式管线，论文抓到即处理，处理完即输出
+
+        Args:
+            scraper: 论文抓取器，在后台线程中运行
+            translator: 翻译器实例
+            classifier: 分类器实例
+            queue_size: 抓取结果队列的容量，队列满时抓取线程阻塞形成背压
+            batch_size: 每个处理批次最多包含的论文数
+            batch_timeout: 凑批的最长等待时间（秒），避免抓取较慢时论文积压
+            workers: 并发处理批次的worker数
+            category_workers: 并发抓取列表页和摘要的线程数，请求速率仍受抓取器全局限速约束
+            journal: 可选的检查点日志，用于跳过上次运行已完成的工作
+            pre_classifier: 可选的本地预分类器
+            metrics: 可选的运行指标，记录各阶段耗时、队列深度和处理的论文数
+        """
+        self.scraper = scraper
+        self.translator = translator
+        self.classifier = classifier
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.workers = workers
+        self.category_workers = category_workers
+        self.journal = journal
+        self.pre_classifier = pre_classifier
+        self.metrics = metrics or Metrics()
+        self.paper_queue: Optional[asyncio.Queue] = None
+        self.duplicates = 0
+        # 本次运行中翻译或分类失败的论文数，不为0时运行未完成，检查点保留供 --resume 重试
+        self.failed = 0
+        # 本次回填中检索失败的区间数，不为0时同样视为未完成
+        self.shard_errors = 0
+        # 本次运行中列表页读取失败的分类数，失败的分类不写入检查点，不为0时同样视为未完成
+        self.listing_errors = 0
+        # 抓取线程入队时等待中的put，管线中止时取消，避免线程永久阻塞
+        self._put_lock = threading.Lock()
+        self._pending_puts: Set[Future] = set()
+        self._aborted = False
+
+    async def run(
+        self,
+        categories: List[str],
+        max_results: Optional[int],
+        on_result: Callable[[Paper, List[str]], None],
+        skip_ids: Optional[Container[str]] = None
+    ) -> int:
+        """
+        运行管线直到所有分类抓取并处理完毕
+
+        Args:
+            categories: 要抓取的arXiv分类列表
+            max_results: 每个分类最多抓取的论文数
+            on_result: 每篇论文处理完成后的回调，参数为 (paper, categories_list)
+            skip_ids: 已处理过的论文ID（不含版本号），列表页中的这些论文不再获取摘要和调用LLM
+
+        Returns:
+            本次处理的论文数（去重并跳过skip_ids之后）
+        """
+        loop = asyncio.get_running_loop()
+        self.failed = 0
+        self.listing_errors = 0
+        self.paper_queue = asyncio.Queue(maxsize=self.queue_size)
+        self._aborted = False
+        workers = [asyncio.create_task(self._process_worker(on_result)) for _ in range(self.workers)]
+        papers = []
+        executor = ThreadPoolExecutor(max_workers=self.category_workers)
+        try:
+            # 先并发读取所有分类的列表页（不含摘要），去重后再获取摘要和调用LLM
+            start = time.perf_counter()
+            listings = await asyncio.gather(*(
+                loop.run_in_executor(executor, self._fetch_listing, category, max_results)
+                for category in categories
+            ), return_exceptions=True)
+            self.metrics.observe('stage_listing_seconds', time.perf_counter() - start)
+            deduplicator = PaperDeduplicator()
+            for category, listing in zip(categories, listings):
+                if isinstance(listing, BaseException):
+                    print(f"Error fetching papers from {category}: {listing}")
+                    self.listing_errors += 1
+                    self.metrics.incr('listing_errors')
+                    continue
+                print(f"Fetched {len(listing)} papers from {category}")
+                deduplicator.add(listing)
+            papers = deduplicator.result()
+            self.duplicates = deduplicator.duplicates
+            self.metrics.incr('papers_unique', len(papers))
+            self.metrics.incr('papers_duplicates', self.duplicates)
+            print(f"Found {len(papers)} unique papers, removed {self.duplicates} cross-listed duplicates")
+            if skip_ids:
+                new_papers = [paper for paper in papers if strip_version(paper.id) not in skip_ids]
+                self.metrics.incr('papers_skipped', len(papers) - len(new_papers))
+                print(f"Skipping {len(papers) - len(new_papers)} papers processed earlier, {len(new_papers)} new")
+                papers = new_papers
+
+            async def produce():
+                chunk_size = self.scraper.abstract_resolver.batch_size
+                start = time.perf_counter()
+                results = await asyncio.gather(*(
+                    loop.run_in_executor(executor, self._produce, loop, papers[offset:offset + chunk_size])
+                    for offset in range(0, len(papers), chunk_size)
+                ), return_exceptions=True)
+                self.metrics.observe('stage_scrape_seconds', time.perf_counter() - start)
+                for result in results:
+                    if isinstance(result, BaseException):
+                        print(f"Error fetching abstracts: {result}")
+                executor.shutdown()
+                await self.paper_queue.put(_DONE)
+
+            await self._supervise(produce(), workers)
+        except BaseException:
+            # 中断或worker异常退出时不能等待抓取线程：它们可能正阻塞在已无人消费的队列上
+            self._abort_producers()
+            for worker in workers:
+                worker.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        start = time.perf_counter()
+        await self._join_workers(workers)
+        # 抓取结束后等待剩余批次处理完的时间，过长说明LLM是瓶颈
+        self.metrics.observe('stage_drain_seconds', time.perf_counter() - start)
+        return len(papers)
+
+    async def run_backfill(
+        self,
+        backfill: ArxivBackfill,
+        categories: List[str],
+        start: date,
+        end: date,
+        on_result: Callable[[Paper, List[str]], None]
+    ) -> int:
+        """
+        回填一段日期内的论文：各分类、各日期区间在进程池中并行检索，
+        每个区间取回后即去重并送入与日常运行相同的翻译/分类流程
+
+        Args:
+            backfill: 负责切分和检索任务的ArxivBackfill
+            categories: 要回填的arXiv分类列表
+            start: 开始日期（含）
+            end: 结束日期（含）
+            on_result: 每篇论文处理完成后的回调
+
+        Returns:
+            去重后的论文总数
+        """
+        loop = asyncio.get_running_loop()
+        self.failed = 0
+        self.shard_errors = 0
+        self.paper_queue = asyncio.Queue(maxsize=self.queue_size)
+        workers = [asyncio.create_task(self._process_worker(on_result)) for _ in range(self.workers)]
+        # 回填的论文量可能很大，已送入队列的论文不再由去重器持有
+        deduplicator = PaperDeduplicator(keep_papers=False)
+        shards = backfill.shards(categories, start, end)
+        print(f"Backfilling {start} to {end}: {len(shards)} shards")
+        executor = backfill.create_executor()
+        try:
+            async def fetch(shard):
+                key = backfill.shard_key(shard)
+                papers = self.journal.pop('listing', key) if self.journal else None
+                if papers is not None:
+                    papers = [as_paper(paper) for paper in papers]
+                else:
+                    with self.metrics.timer('backfill_shard_seconds'):
+                        papers = await loop.run_in_executor(executor, fetch_shard, shard)
+                    if self.journal:
+                        self.journal.record('listing', key, papers)
+                return shard, papers
+
+            async def produce():
+                for task in asyncio.as_completed([fetch(shard) for shard in shards]):
+                    try:
+                        shard, papers = await task
+                    except Exception as e:
+                        print(f"Error fetching backfill shard: {e}")
+                        self.shard_errors += 1
+                        self.metrics.incr('backfill_shard_errors')
+                        continue
+                    added = deduplicator.add(papers)
+                    self.metrics.incr('backfill_shards')
+                    self.metrics.incr('papers_unique', len(added))
+                    print(f"Fetched {len(papers)} papers from {shard[0]} {shard[1]}..{shard[2]}, {len(added)} new")
+                    for paper in added:
+                        await self.paper_queue.put(paper)
+                        self.metrics.set_gauge('paper_queue_depth', self.paper_queue.qsize())
+                await self.paper_queue.put(_DONE)
+
+            await self._supervise(produce(), workers)
+        except BaseException:
+            for worker in workers:
+                worker.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+        self.duplicates = deduplicator.duplicates
+        self.metrics.incr('papers_duplicates', self.duplicates)
+        print(f"Found {len(deduplicator.papers)} unique papers, removed {self.duplicates} cross-listed duplicates")
+        start_time = time.perf_counter()
+        await self._join_workers(workers)
+        self.metrics.observe('stage_drain_seconds', time.perf_counter() - start_time)
+        return len(deduplicator.papers)
+
+    async def _supervise(self, producer: Awaitable[None], workers: List[asyncio.Task]) -> None:
+        """
+        等待生产者把所有论文和结束标记放入队列。worker只会在收到结束标记后正常退出，
+        在此之前有worker退出说明它抛出了异常，此时队列可能再也没有人消费，
+        生产者会一直阻塞在put上，因此取消生产者并抛出该worker的异常
+        """
+        producer = asyncio.ensure_future(producer)
+        done, _ = await asyncio.wait([producer, *workers], return_when=asyncio.FIRST_COMPLETED)
+        if producer in done:
+            producer.result()
+            return
+        producer.cancel()
+        failed = next(iter(done))
+        raise failed.exception() or asyncio.CancelledError()
+
+    async def _join_workers(self, workers: List[asyncio.Task]) -> None:
+        """等待worker处理完剩余批次；任一worker抛出异常时取消其余worker并抛出该异常"""
+        done, pending = await asyncio.wait(workers, return_when=asyncio.FIRST_EXCEPTION)
+        for worker in pending:
+            worker.cancel()
+        for worker in done:
+            worker.result()
+
+    def _abort_producers(self) -> None:
+        """让抓取线程停止入队，并取消正阻塞在队列上的put"""
+        with self._put_lock:
+            self._aborted = True
+            for future in self._pending_puts:
+                future.cancel()
+
+    def _put(self, loop: asyncio.AbstractEventLoop, paper: Paper) -> bool:
+        """
+        在抓取线程中把论文放入队列，队列满时阻塞形成背压
+
+        Returns:
+            管线已中止时返回False，抓取线程应停止
+        """
+        with self._put_lock:
+            if self._aborted:
+                return False
+            future = asyncio.run_coroutine_threadsafe(self.paper_queue.put(paper), loop)
+            self._pending_puts.add(future)
+        try:
+            future.result()
+        except CancelledError:
+            return False
+        finally:
+            with self._put_lock:
+                self._pending_puts.discard(future)
+        return True
+
+    def _fetch_listing(self, category: str, max_results: Optional[int]) -> List[Paper]:
+        if self.journal:
+            listing = self.journal.pop('listing', category)
+            if listing is not None:
+                return [as_paper(paper) for paper in listing]
+        with self.metrics.timer('listing_seconds'):
+            listing = self.scraper.get_listing(category, max_results)
+        if self.journal:
+            self.journal.record('listing', category, listing)
+        return listing
+
+    def _produce(self, loop: asyncio.AbstractEventLoop, papers: List[Paper]) -> None:
+        if self.journal:
+            for paper in papers:
+                scraped = self.journal.pop('scrape', paper['id'])
+                if scraped is not None:
+                    paper['abstract'] = scraped
+        with self.metrics.timer('abstract_chunk_seconds'):
+            self.scraper.resolve_abstracts(papers)
+        if self.journal:
+            for paper in papers:
+                if not self.journal.has('scrape', paper['id']):
+                    self.journal.record('scrape', paper['id'], paper['abstract'])
+        for paper in papers:
+            paper.abstract = paper.abstract or ''
+            if not self._put(loop, paper):
+                return
+            self.metrics.set_gauge('paper_queue_depth', self.paper_queue.qsize())
+
+    async def _next_batch(self) -> List[Paper]:
+        item = await self.paper_queue.get()
+        if item is _DONE:
+            await self.paper_queue.put(_DONE)
+            return []
+        batch = [item]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_timeout
+        while len(batch) < self.batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.paper_queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is _DONE:
+                # 放回结束标记，让其他worker也能退出
+                await self.paper_queue.put(_DONE)
+                break
+            batch.append(item)
+        return batch
+
+    async def _process_worker(self, on_result: Callable[[Paper, List[str]], None]) -> None:
+        while True:
+            batch = await self._next_batch()
+            if not batch:
+                return
+            self.metrics.set_gauge('paper_queue_depth', self.paper_queue.qsize())
+            try:
+                with self.metrics.timer('batch_process_seconds'):
+                    results = await process_papers(
+                        batch, self.translator, self.classifier, self.journal, self.pre_classifier
+                    )
+            except Exception as e:
+                print(f"Error processing batch of {len(batch)} papers: {e}")
+                results = [(None, None)] * len(batch)
+            for paper, categories_list in results:
+                if paper and categories_list:
+                    try:
+                        on_result(paper, categories_list)
+                    except Exception as e:
+                        print(f"Error writing {paper.id}: {e}")
+                    else:
+                        self.metrics.incr('papers_processed')
+                        continue
+                self.failed += 1
+                self.metrics.incr('papers_failed')
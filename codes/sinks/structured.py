@@ -0,0 +1,244 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+import glob
+import json
+import os
+import re
+from url_tools.paper import Paper
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# JsonlSink写出的每行都以id开头，扫描已有文件时无需解析整行JSON
+JSONL_ID_PATTERN = re.compile(r'^\{"id": "((?:[^"\\]|\\.)*)"')
+
+
+def paper_record(paper: Paper, categories: List[str]) -> Dict:
+    """
+    把管线输出的论文转为结构化记录，保留抓取到的全部字段
+
+    Args:
+        paper: process_papers产出的Paper，title/abstract为原文，title_zh/abstract_zh为译文
+        categories: 分类结果列表
+
+    Returns:
+        字段固定的记录字典，id在最前
+    """
+    subjects = paper.subjects or ''
+    return {
+        'id': paper.id,
+        'title': paper.title,
+        'abstract': paper.abstract,
+        'title_zh': paper.title_zh or paper.title,
+        'abstract_zh': paper.abstract_zh or paper.abstract,
+        'authors': list(paper.authors),
+        'primary_subject': paper.primary_subject or '',
+        'subjects': [subject.strip() for subject in subjects.split(';') if subject.strip() and subjects != 'N/A'],
+        'categories': list(categories),
+        'url': paper.url,
+        'pdf_url': paper.pdf_url or '',
+        'date': paper.date or ''
+    }
+
+
+def paper_from_record(record: Dict) -> Paper:
+    """
+    paper_record的逆过程，从结构化记录恢复Paper，用于合并各任务的输出
+
+    Args:
+        record: paper_record产出的记录字典
+    """
+    paper = Paper(
+        id=record['id'],
+        title=record['title'],
+        authors=record.get('authors') or [],
+        abstract=record['abstract'],
+        primary_subject=record.get('primary_subject') or 'N/A',
+        subjects='; '.join(record.get('subjects') or []) or 'N/A',
+        pdf_url=record.get('pdf_url') or '',
+        arxiv_url=record['url'],
+        date=record.get('date') or ''
+    )
+    paper.title_zh = record.get('title_zh')
+    paper.abstract_zh = record.get('abstract_zh')
+    paper.categories = record.get('categories') or []
+    return paper
+
+
+class PaperSink:
+    """输出端接口：管线每处理完一篇论文调用一次add，结束时调用close"""
+
+    def add(self, paper: Paper, categories: List[str]) -> None:
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        pass
+
+    def commit(self) -> None:
+        """常驻服务每轮结束时调用：使已加入的论文在磁盘上完整可读，之后仍可继续add"""
+        self.flush()
+
+    def close(self) -> None:
+        self.flush()
+
+
+class MultiSink(PaperSink):
+    def __init__(self, sinks: List[PaperSink]):
+        """
+        把每篇论文分发给多个输出端
+
+        Args:
+            sinks: 输出端列表
+        """
+        self.sinks = sinks
+
+    def add(self, paper: Paper, categories: List[str]) -> None:
+        for sink in self.sinks:
+            sink.add(paper, categories)
+
+    def flush(self) -> None:
+        for sink in self.sinks:
+            sink.flush()
+
+    def commit(self) -> None:
+        for sink in self.sinks:
+            sink.commit()
+
+    def close(self) -> None:
+        # 一个输出端关闭失败不影响其他输出端保存已处理的论文
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception as e:
+                print(f"Error closing {type(sink).__name__}: {e}")
+
+
+class JsonlSink(PaperSink):
+    def __init__(self, path: str, merge: bool = True, flush_every: int = 50):
+        """
+        流式JSON Lines输出，每篇论文一行，追加写入
+
+        Args:
+            path: 输出文件路径
+            merge: 为True时保留已有文件并跳过其中已有的论文，否则重新写
+            flush_every: 每累计多少篇论文刷新一次到磁盘
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.flush_every = flush_every
+        self.ids: Set[str] = set()
+        self.pending: List[str] = []
+        if merge and os.path.exists(path):
+            self._load_ids()
+        self._file = open(path, 'a' if merge else 'w', encoding='utf-8')
+
+    def _load_ids(self) -> None:
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                match = JSONL_ID_PATTERN.match(line)
+                if match:
+                    self.ids.add(json.loads(f'"{match.group(1)}"'))
+
+    def add(self, paper: Paper, categories: List[str]) -> None:
+        record = paper_record(paper, categories)
+        if record['id'] in self.ids:
+            return
+        self.ids.add(record['id'])
+        self.pending.append(json.dumps(record, ensure_ascii=False))
+        if len(self.pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.pending:
+            self._file.write('\n'.join(self.pending) + '\n')
+            self.pending = []
+        self._file.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+
+
+PARQUET_SCHEMA = pa.schema([
+    ('id', pa.string()),
+    ('title', pa.string()),
+    ('abstract', pa.string()),
+    ('title_zh', pa.string()),
+    ('abstract_zh', pa.string()),
+    ('authors', pa.list_(pa.string())),
+    ('primary_subject', pa.string()),
+    ('subjects', pa.list_(pa.string())),
+    ('categories', pa.list_(pa.string())),
+    ('url', pa.string()),
+    ('pdf_url', pa.string()),
+    ('date', pa.string())
+]) if pa is not None else None
+
+
+class ParquetSink(PaperSink):
+    def __init__(self, directory: str, merge: bool = True, row_group_size: int = 1000):
+        """
+        列式Parquet输出：目录作为一个数据集，每次运行写一个part文件，
+        每凑满row_group_size篇论文写一个row group，可直接用 pandas.read_parquet(directory) 读取
+
+        Args:
+            directory: 数据集目录
+            merge: 为True时跳过目录中已有的论文，否则清空已有的part文件
+            row_group_size: 每个row group的论文数
+        """
+        if pa is None:
+            raise ImportError("pyarrow is required for Parquet output")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.row_group_size = row_group_size
+        self.ids: Set[str] = set()
+        self.rows: List[Dict] = []
+        existing = sorted(glob.glob(os.path.join(directory, 'part-*.parquet')))
+        if merge:
+            for path in existing:
+                self.ids.update(pq.read_table(path, columns=['id']).column('id').to_pylist())
+        else:
+            for path in existing:
+                os.remove(path)
+        self.path = self._part_path()
+        self._writer: Optional[pq.ParquetWriter] = None
+
+    def _part_path(self) -> str:
+        timestamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+        return os.path.join(self.directory, f'part-{timestamp}.parquet')
+
+    def add(self, paper: Paper, categories: List[str]) -> None:
+        record = paper_record(paper, categories)
+        if record['id'] in self.ids:
+            return
+        self.ids.add(record['id'])
+        self.rows.append(record)
+        if len(self.rows) >= self.row_group_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.rows:
+            return
+        if self._writer is None:
+            # 写完前Parquet文件没有footer不可读，先写临时文件，close时再改名
+            self._writer = pq.ParquetWriter(f'{self.path}.tmp', PARQUET_SCHEMA)
+        self._writer.write_table(pa.Table.from_pylist(self.rows, schema=PARQUET_SCHEMA))
+        self.rows = []
+
+    def commit(self) -> None:
+        # 结束当前part文件使其可读，之后的论文写入新的part文件
+        self.close()
+        self.path = self._part_path()
+
+    def close(self) -> None:
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            os.replace(f'{self.path}.tmp', self.path)
+            self._writer = None
@@ -0,0 +1,93 @@
+import requests
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterable, List, Optional
+from url_tools.http_client import ArxivHttpClient
+from monitoring.metrics import Metrics
+import re
+
+ATOM_NS = {'atom': 'http://www.w3.org/2005/Atom'}
+VERSION_PATTERN = re.compile(r'v\d+$')
+
+
+def strip_version(paper_id: str) -> str:
+    """去掉arXiv ID末尾的版本号，如 2401.00001v2 -> 2401.00001"""
+    return VERSION_PATTERN.sub('', paper_id.strip())
+
+
+class ArxivAbstractResolver:
+    def __init__(
+        self,
+        export_url: str = "http://export.arxiv.org/api/query",
+        batch_size: int = 100,
+        http_client: Optional[ArxivHttpClient] = None,
+        metrics: Optional[Metrics] = None
+    ):
+        """
+        通过arXiv export API的id_list参数批量获取摘要
+
+        Args:
+            export_url: export API查询地址
+            batch_size: 每次请求包含的论文ID数量
+            http_client: 限速HTTP客户端，为空时按arXiv要求的每3秒1次请求新建
+            metrics: 可选的运行指标，记录feed解析耗时
+        """
+        self.export_url = export_url
+        self.batch_size = batch_size
+        self.http_client = http_client or ArxivHttpClient(rate=1 / 3)
+        self.metrics = metrics or Metrics()
+
+    def resolve(self, paper_ids: Iterable[str]) -> Dict[str, str]:
+        """
+        批量获取摘要
+
+        Args:
+            paper_ids: arXiv论文ID列表
+
+        Returns:
+            论文ID到摘要的映射，未能获取的ID不在结果中
+        """
+        ids = list(dict.fromkeys(paper_ids))
+        abstracts = {}
+        for start in range(0, len(ids), self.batch_size):
+            batch = ids[start:start + self.batch_size]
+            try:
+                abstracts.update(self._fetch_batch(batch))
+            except (requests.RequestException, ET.ParseError) as e:
+                print(f"Error fetching abstracts batch: {e}")
+        return abstracts
+
+    def _fetch_batch(self, paper_ids: List[str]) -> Dict[str, str]:
+        params = {
+            'id_list': ','.join(paper_ids),
+            'max_results': len(paper_ids)
+        }
+        response = self.http_client.get(self.export_url, params=params)
+        response.raise_for_status()
+        with self.metrics.timer('export_parse_seconds'):
+            return self.parse_feed(response.content, paper_ids)
+
+    @staticmethod
+    def parse_feed(content: bytes, paper_ids: List[str]) -> Dict[str, str]:
+        """
+        解析export API返回的Atom feed
+
+        Args:
+            content: Atom XML内容
+            paper_ids: 请求的论文ID，用于把返回的版本化ID映射回去
+
+        Returns:
+            论文ID到摘要的映射
+        """
+        wanted = {strip_version(paper_id): paper_id for paper_id in paper_ids}
+        abstracts = {}
+        root = ET.fromstring(content)
+        for entry in root.findall('atom:entry', ATOM_NS):
+            entry_id = entry.findtext('atom:id', default='', namespaces=ATOM_NS)
+            summary = entry.findtext('atom:summary', default='', namespaces=ATOM_NS)
+            if '/abs/' not in entry_id or not summary.strip():
+                # 无效ID时API会返回一条标题为Error的条目
+                continue
+            paper_id = wanted.get(strip_version(entry_id.split('/abs/', 1)[1]))
+            if paper_id:
+                abstracts[paper_id] = ' '.join(summary.split())
+        return abstracts
@@ -0,0 +1,177 @@
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+from url_tools.arxiv_abstracts import ATOM_NS, strip_version
+from url_tools.http_client import ArxivHttpClient, SharedRateLimiter, create_session
+from url_tools.paper import Paper
+
+FEED_NS = {
+    **ATOM_NS,
+    'arxiv': 'http://arxiv.org/schemas/atom',
+    'opensearch': 'http://a9.com/-/spec/opensearch/1.1/'
+}
+
+# (分类, 开始日期, 结束日期)，日期为ISO格式字符串，两端都包含
+Shard = Tuple[str, str, str]
+
+
+def date_windows(start: date, end: date, window_days: int) -> List[Tuple[date, date]]:
+    """
+    把 [start, end] 切分为每段最多window_days天的连续区间
+
+    Args:
+        start: 开始日期（含）
+        end: 结束日期（含）
+        window_days: 每段的天数
+    """
+    windows = []
+    while start <= end:
+        window_end = min(end, start + timedelta(days=window_days - 1))
+        windows.append((start, window_end))
+        start = window_end + timedelta(days=1)
+    return windows
+
+
+def parse_search_feed(content: bytes, base_url: str) -> Tuple[int, List[Paper]]:
+    """
+    解析export API按分类和日期检索的Atom feed
+
+    Args:
+        content: Atom XML内容
+        base_url: arXiv网站地址，用于生成与列表页一致的论文链接
+
+    Returns:
+        (检索结果总数, Paper列表)，与列表页解析结果一致且已包含摘要
+    """
+    root = ET.fromstring(content)
+    total = int(root.findtext('opensearch:totalResults', default='0', namespaces=FEED_NS))
+    papers = []
+    for entry in root.findall('atom:entry', FEED_NS):
+        entry_id = entry.findtext('atom:id', default='', namespaces=FEED_NS)
+        summary = entry.findtext('atom:summary', default='', namespaces=FEED_NS)
+        if '/abs/' not in entry_id or not summary.strip():
+            continue
+        paper_id = strip_version(entry_id.split('/abs/', 1)[1])
+        primary = entry.find('arxiv:primary_category', FEED_NS)
+        subjects = [
+            category.get('term') for category in entry.findall('atom:category', FEED_NS) if category.get('term')
+        ]
+        papers.append(Paper(
+            id=paper_id,
+            title=' '.join(entry.findtext('atom:title', default='', namespaces=FEED_NS).split()),
+            authors=[
+                ' '.join(author.findtext('atom:name', default='', namespaces=FEED_NS).split())
+                for author in entry.findall('atom:author', FEED_NS)
+            ],
+            abstract=' '.join(summary.split()),
+            primary_subject=primary.get('term') if primary is not None else (subjects[0] if subjects else 'N/A'),
+            subjects='; '.join(subjects) if subjects else 'N/A',
+            pdf_url=f"{base_url}/pdf/{paper_id}",
+            arxiv_url=f"{base_url}/abs/{paper_id}",
+            date=entry.findtext('atom:published', default='', namespaces=FEED_NS)[:10]
+        ))
+    return total, papers
+
+
+# 子进程中的配置和HTTP客户端，由_init_worker在进程启动时设置
+_worker: Dict = {}
+
+
+def _init_worker(limiter: SharedRateLimiter, base_url: str, export_url: str, page_size: int, headers: Dict) -> None:
+    _worker.update({
+        'client': ArxivHttpClient(create_session(pool_size=1), headers=headers, limiter=limiter),
+        'base_url': base_url,
+        'export_url': export_url,
+        'page_size': page_size
+    })
+
+
+def fetch_shard(shard: Shard, empty_page_retries: int = 3) -> List[Paper]:
+    """
+    在进程池中运行：分页获取一个分类在一段日期内提交的全部论文
+
+    Args:
+        shard: (分类, 开始日期, 结束日期)
+        empty_page_retries: export API偶尔在结果未取完时返回空页，此时重试的次数，用完后抛出RuntimeError
+
+    Returns:
+        区间内的全部论文
+    """
+    category, start, end = shard
+    query = f"cat:{category} AND submittedDate:[{start.replace('-', '')}0000 TO {end.replace('-', '')}2359]"
+    papers, offset, retries = [], 0, 0
+    while True:
+        response = _worker['client'].get(_worker['export_url'], params={
+            'search_query': query,
+            'start': offset,
+            'max_results': _worker['page_size'],
+            'sortBy': 'submittedDate',
+            'sortOrder': 'ascending'
+        })
+        response.raise_for_status()
+        total, page = parse_search_feed(response.content, _worker['base_url'])
+        if not page and offset < total:
+            if retries < empty_page_retries:
+                retries += 1
+                continue
+            # 结果未取完时不能返回部分论文，否则该区间会被当作已完成写入检查点
+            raise RuntimeError(
+                f"export API returned no results for {category} {start}..{end} at {offset} of {total}"
+            )
+        papers.extend(page)
+        offset += _worker['page_size']
+        if not page or offset >= total:
+            return papers
+
+
+class ArxivBackfill:
+    def __init__(
+        self,
+        base_url: str = "https://arxiv.org",
+        export_url: str = "http://export.arxiv.org/api/query",
+        rate_limit: float = 1 / 3,
+        workers: int = 4,
+        window_days: int = 7,
+        page_size: int = 1000
+    ):
+        """
+        历史回填：按分类和日期区间切分任务，在进程池中通过export API检索，
+        结果直接带摘要，无需再逐篇获取
+
+        Args:
+            base_url: arXiv网站地址
+            export_url: export API查询地址
+            rate_limit: 所有进程合计访问export API的速率（请求/秒）
+            workers: 进程数，负责请求和解析feed
+            window_days: 每个任务覆盖的天数
+            page_size: 每次请求返回的论文数，arXiv建议不超过2000
+        """
+        self.base_url = base_url.rstrip('/')
+        self.export_url = export_url
+        self.rate_limit = rate_limit
+        self.workers = workers
+        self.window_days = window_days
+        self.page_size = page_size
+        self.headers = {'User-Agent': 'Mozilla/5.0 (compatible; arxiv-daily backfill)'}
+
+    def shards(self, categories: List[str], start: date, end: date) -> List[Shard]:
+        """按日期先后、同一日期区间内按分类排列任务，使结果大致按时间顺序产出"""
+        return [
+            (category, window_start.isoformat(), window_end.isoformat())
+            for window_start, window_end in date_windows(start, end, self.window_days)
+            for category in categories
+        ]
+
+    @staticmethod
+    def shard_key(shard: Shard) -> str:
+        """检查点日志中记录该任务结果使用的键"""
+        return f"backfill:{shard[0]}:{shard[1]}:{shard[2]}"
+
+    def create_executor(self) -> ProcessPoolExecutor:
+        """创建进程池，所有子进程共享同一个限速器"""
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(SharedRateLimiter(self.rate_limit), self.base_url, self.export_url, self.page_size, self.headers)
+        )
@@ -1,20 +1,79 @@
-import requests
-from bs4 import BeautifulSoup
-from typing import List, Dict
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
-import re
-import time
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+from url_tools.http_cache import HttpCache
+from url_tools.http_client import ArxivHttpClient, create_session
+from url_tools.arxiv_abstracts import ArxivAbstractResolver
+from url_tools.paper import Paper
+from url_tools.paper_cache import PaperCache
+from url_tools.parsers import get_parser
+from monitoring.metrics import Metrics
 
 class ArxivWebScraper:
-    def __init__(self):
-        self.base_url = "https://arxiv.org"
+    def __init__(
+        self,
+        base_url: str = "https://arxiv.org",
+        export_url: str = "http://export.arxiv.org/api/query",
+        abstract_batch_size: int = 100,
+        paper_cache: Optional[PaperCache] = None,
+        rate_limit: float = 1.0,
+        export_rate_limit: float = 1 / 3,
+        burst: int = 1,
+        fetch_workers: int = 4,
+        parser: Optional[str] = None,
+        metrics: Optional[Metrics] = None,
+        quiet: bool = False,
+        http_cache: Optional[HttpCache] = None
+    ):
+        """
+        Args:
+            base_url: arXiv网站地址
+            export_url: export API查询地址
+            abstract_batch_size: 每次export API请求查询的摘要数
+            paper_cache: 可选的论文元数据缓存
+            rate_limit: 访问arXiv网页的全局速率（请求/秒），所有线程共享
+            export_rate_limit: 访问export API的全局速率（请求/秒）
+            burst: 允许的最大突发请求数
+            fetch_workers: 并发抓取详情页的线程数
+            parser: 页面解析后端，'lxml' 或 'bs4'，默认优先lxml
+            metrics: 可选的运行指标，记录请求耗时、解析耗时和各来源的摘要数
+            quiet: 为True时不在终端打印进度状态行
+            http_cache: 可选的网页响应缓存，列表页和详情页以条件请求获取，未变化时服务器返回304
+        """
+        self.base_url = base_url.rstrip('/')
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         self.terminal_width = shutil.get_terminal_size().columns or 80
+        self.fetch_workers = fetch_workers
+        self.metrics = metrics or Metrics()
+        self.quiet = quiet
+        # 网页和export API共用一个连接池，但各自限速
+        session = create_session(pool_size=max(fetch_workers, 4))
+        self.http_client = ArxivHttpClient(
+            session,
+            rate=rate_limit,
+            burst=burst,
+            headers=self.headers,
+            metrics=self.metrics,
+            name='arxiv',
+            http_cache=http_cache
+        )
+        self.abstract_resolver = ArxivAbstractResolver(
+            export_url=export_url,
+            batch_size=abstract_batch_size,
+            http_client=ArxivHttpClient(
+                session, rate=export_rate_limit, headers=self.headers, metrics=self.metrics, name='export_api'
+            ),
+            metrics=self.metrics
+        )
+        self.paper_cache = paper_cache
+        self.parser = get_parser(parser)
+        # (列表页URL, max_results) -> (页面的ETag或Last-Modified, 解析出的条目)；页面未变时跳过解析
+        self._listings: Dict[Tuple[str, Optional[int]], Tuple[str, List[Dict]]] = {}
 
-    def get_latest_papers(self, category: str, max_results: int = None) -> List[Dict]:
+    def get_latest_papers(self, category: str, max_results: int = None) -> List[Paper]:
         """
         从arXiv网页直接获取最新论文
         
@@ -23,97 +82,99 @@ class ArxivWebScraper:
             max_results: 最大返回结果数量
         
         Returns:
-            包含论文信息的字典列表
+            Paper列表
+        """
+        papers = self.get_listing(category, max_results)
+        self.resolve_abstracts(papers)
+        return papers
+
+    def get_listing(self, category: str, max_results: int = None) -> List[Paper]:
+        """
+        获取分类列表页中的论文元数据（不含摘要）
+        
+        Args:
+            category: arXiv分类代码
+            max_results: 最大返回结果数量
+        
+        Returns:
+            Paper列表，abstract字段为None。请求失败时抛出requests.RequestException，
+            而不是返回空列表，以免调用方把该分类当作没有新论文
         """
         # 构建URL
         url = f"{self.base_url}/list/{category}/recent?skip=0&show=2000"
         
-        try:
-            # 获取网页内容
-            status_msg = f"Fetching papers from {url}"
+        # 获取网页内容
+        self._status(f"Fetching papers from {url}")
+        response = self.http_client.get(url)
+        response.raise_for_status()
+
+        validator = response.headers.get('ETag') or response.headers.get('Last-Modified')
+        memo = self._listings.get((url, max_results))
+        if validator and memo is not None and memo[0] == validator:
+            self.metrics.incr('listing_parse_skipped')
+            entries = memo[1]
+        else:
+            with self.metrics.timer('listing_parse_seconds'):
+                entries = self.parser.parse_listing(response.text, self.base_url, max_results)
+            if validator:
+                self._listings[(url, max_results)] = (validator, entries)
+        return self._build_papers(entries)
+
+    def _status(self, status_msg: str) -> None:
+        """在终端同一行刷新进度，quiet模式下不输出"""
+        if not self.quiet:
             print(status_msg.ljust(self.terminal_width), end="\r", flush=True)
-            response = requests.get(url, headers=self.headers)
-            time.sleep(1)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # 找到论文列表区域
-            dlpage = soup.find('div', {'id': 'dlpage'})
-            if not dlpage:
-                print("Cannot find paper list section")
-                return []
-            
-            papers = []
-            # 查找所有论文条目
-            articles = soup.find('dl', {'id': 'articles'})
-            if not articles:
-                return []
-            
-            for dt, dd in zip(articles.find_all('dt'), articles.find_all('dd')):
-                if max_results and len(papers) >= max_results:
-                    break
-                    
-                try:
-                    # 获取论文ID和链接
-                    paper_link = dt.find('a', {'title': 'Abstract'})
-                    if not paper_link:
-                        continue
-                    paper_id = paper_link.text.strip().replace('arXiv:', '')
-                    
-                    # 获取PDF链接
-                    pdf_link = dt.find('a', {'title': 'Download PDF'})
-                    pdf_url = f"{self.base_url}{pdf_link['href']}" if pdf_link else None
-                    
-                    # 解析论文元数据
-                    meta = dd.find('div', {'class': 'meta'})
-                    if not meta:
-                        continue
-                    
-                    # 获取标题
-                    title_div = meta.find('div', {'class': 'list-title'})
-                    title = title_div.text.replace('Title:', '').strip() if title_div else 'N/A'
-                    
-                    # 获取作者列表
-                    authors_div = meta.find('div', {'class': 'list-authors'})
-                    author_list = []
-                    if authors_div:
-                        author_links = authors_div.find_all('a')
-                        author_list = [a.text.strip() for a in author_links]
-                    
-                    # 获取摘要 - 从单独的页面获取
-                    abstract = self._get_abstract(paper_id)
-                    
-                    # 获取主题分类
-                    subjects_div = meta.find('div', {'class': 'list-subjects'})
-                    if subjects_div:
-                        primary_subject = subjects_div.find('span', {'class': 'primary-subject'})
-                        primary_subject = primary_subject.text.strip() if primary_subject else 'N/A'
-                        subjects = subjects_div.text.replace('Subjects:', '').strip()
-                    else:
-                        primary_subject = 'N/A'
-                        subjects = 'N/A'
-                    
-                    papers.append({
-                        'id': paper_id,
-                        'title': title,
-                        'authors': author_list,
-                        'abstract': abstract,
-                        'primary_subject': primary_subject,
-                        'subjects': subjects,
-                        'pdf_url': pdf_url,
-                        'arxiv_url': f"{self.base_url}/abs/{paper_id}",
-                        'date': datetime.now().strftime('%Y-%m-%d')
-                    })
-                    
-                except Exception as e:
-                    print(f"Error parsing paper: {e}")
-                    continue
-            
-            return papers
-            
-        except requests.RequestException as e:
-            print(f"Error fetching papers: {e}")
-            return []
+
+    def _build_papers(self, entries: List[Dict]) -> List[Paper]:
+        date = datetime.now().strftime('%Y-%m-%d')
+        # 摘要在resolve_abstracts中批量获取
+        return [Paper(
+            id=entry['id'],
+            title=entry['title'],
+            authors=entry['authors'],
+            primary_subject=entry['primary_subject'],
+            subjects=entry['subjects'],
+            pdf_url=entry['pdf_url'],
+            arxiv_url=f"{self.base_url}/abs/{entry['id']}",
+            date=date
+        ) for entry in entries]
+
+    def resolve_abstracts(self, papers: List[Paper]) -> None:
+        """
+        为缺少摘要的论文批量补全摘要：先查本地缓存，再走export API批量查询，
+        未命中的再逐篇抓取详情页
+        
+        Args:
+            papers: Paper列表，原地填充abstract字段
+        """
+        missing = [paper for paper in papers if not paper.get('abstract')]
+        if self.paper_cache is not None and missing:
+            cached = self.paper_cache.get_many(paper['id'] for paper in missing)
+            for paper in missing:
+                if paper['id'] in cached:
+                    paper['abstract'] = cached[paper['id']]['abstract']
+            self.metrics.incr('abstracts_cached', len(cached))
+            missing = [paper for paper in missing if not paper.get('abstract')]
+        if not missing:
+            return
+
+        self._status(f"Fetching {len(missing)} abstracts from export API")
+        abstracts = self.abstract_resolver.resolve(paper['id'] for paper in missing)
+
+        for paper in missing:
+            paper['abstract'] = abstracts.get(paper['id'])
+
+        # export API未命中的论文并发抓取详情页，速率由共享的令牌桶控制
+        misses = [paper for paper in missing if not paper['abstract']]
+        self.metrics.incr('abstracts_export', len(missing) - len(misses))
+        self.metrics.incr('abstracts_page', len(misses))
+        if misses:
+            with ThreadPoolExecutor(max_workers=self.fetch_workers) as executor:
+                for paper, abstract in zip(misses, executor.map(self._get_abstract, (paper['id'] for paper in misses))):
+                    paper['abstract'] = abstract
+
+        if self.paper_cache is not None:
+            self.paper_cache.put_many(missing)
 
     def _get_abstract(self, paper_id: str) -> str:
         """
@@ -127,26 +188,17 @@ class ArxivWebScraper:
         """
         try:
             url = f"{self.base_url}/abs/{paper_id}"
-            status_msg = f"Fetching abstract from {url}"
-            print(status_msg.ljust(self.terminal_width), end="\r", flush=True)
-            response = requests.get(url, headers=self.headers)
-            time.sleep(1)
+            self._status(f"Fetching abstract from {url}")
+            response = self.http_client.get(url)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # 在meta标签中查找摘要
-            meta_abstract = soup.find('meta', {'name': 'citation_abstract'})
-            if meta_abstract and meta_abstract.get('content'):
-                return meta_abstract['content'].strip()
-            
-            # 备选方案：在页面内容中查找摘要
-            abstract_div = soup.find('blockquote', {'class': 'abstract'})
-            if abstract_div:
-                return abstract_div.text.replace('Abstract:', '').strip()
-            
-            return 'N/A'
+            with self.metrics.timer('abstract_parse_seconds'):
+                abstract = self.parser.parse_abstract(response.text)
+            if not abstract:
+                self.metrics.incr('abstracts_missing')
+            return abstract or 'N/A'
             
         except Exception as e:
+            self.metrics.incr('abstracts_missing')
             print(f"Error fetching abstract for {paper_id}: {e}")
             return 'N/A'
 
@@ -0,0 +1,55 @@
+from typing import Dict, Iterable, List, Optional
+from url_tools.arxiv_abstracts import strip_version
+from url_tools.paper import Paper
+
+
+def merge_subjects(first: str, second: str) -> str:
+    """合并两个以分号分隔的主题列表，保持原有顺序"""
+    subjects = [subject for subject in (first or '').split('; ') if subject and subject != 'N/A']
+    for subject in (second or '').split('; '):
+        if subject and subject != 'N/A' and subject not in subjects:
+            subjects.append(subject)
+    return '; '.join(subjects) if subjects else 'N/A'
+
+
+class PaperDeduplicator:
+    def __init__(self, keep_papers: bool = True):
+        """
+        按arXiv ID合并多个分类列表中重复出现的交叉投稿论文
+
+        Args:
+            keep_papers: 为False时只记录见过的ID，不持有论文本身，
+                流式回填中已处理的论文可随即释放，重复论文也不再合并主题
+        """
+        self.keep_papers = keep_papers
+        self.papers: Dict[str, Optional[Paper]] = {}
+        self.duplicates = 0
+
+    def add(self, papers: Iterable[Paper]) -> List[Paper]:
+        """
+        加入一个分类的论文列表，已见过的论文只合并主题而不重复加入
+
+        Args:
+            papers: get_listing返回的Paper列表
+
+        Returns:
+            本次新加入的论文，供流式处理只处理首次出现的论文
+        """
+        added = []
+        for paper in papers:
+            key = strip_version(paper['id'])
+            if key not in self.papers:
+                self.papers[key] = paper if self.keep_papers else None
+                added.append(paper)
+                continue
+            self.duplicates += 1
+            existing = self.papers[key]
+            if existing is None:
+                continue
+            existing['subjects'] = merge_subjects(existing['subjects'], paper['subjects'])
+            if not existing.get('abstract') and paper.get('abstract'):
+                existing['abstract'] = paper['abstract']
+        return added
+
+    def result(self) -> List[Paper]:
+        return [paper for paper in self.papers.values() if paper is not None]
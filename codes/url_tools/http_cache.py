@@ -0,0 +1,195 @@
+import hashlib
+import json
+import mmap
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# 随缓存的响应体一起保存、在重新构造的响应中恢复的响应头
+STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Cache-Control')
+
+
+class HttpCacheEntry:
+    __slots__ = ('url', 'path', 'size', 'headers', 'encoding', 'stored_at')
+
+    def __init__(
+        self,
+        url: str,
+        path: str,
+        size: int,
+        headers: Dict[str, str],
+        encoding: Optional[str],
+        stored_at: float
+    ):
+        self.url = url
+        self.path = path
+        self.size = size
+        self.headers = headers
+        self.encoding = encoding
+        self.stored_at = stored_at
+
+    def validators(self) -> Dict[str, str]:
+        """条件请求头：服务器判断内容未变时返回304而不是完整页面"""
+        validators = {}
+        if self.headers.get('ETag'):
+            validators['If-None-Match'] = self.headers['ETag']
+        if self.headers.get('Last-Modified'):
+            validators['If-Modified-Since'] = self.headers['Last-Modified']
+        return validators
+
+
+class HttpCache:
+    def __init__(self, directory: str, max_bytes: int = 512 * 2 ** 20, max_age: float = 0):
+        """
+        保存带校验字段（ETag/Last-Modified）的原始响应，用于条件请求。
+        每个响应体是一个单独的文件，写入时原子替换，读取时内存映射，不把整页读入内存；
+        元数据保存在SQLite中，多个进程可共用同一个目录
+
+        Args:
+            directory: 缓存目录
+            max_bytes: 响应体总大小上限，超出时按最近访问时间淘汰
+            max_age: 缓存时间不超过该秒数的响应直接使用，不再发条件请求；0表示每次都向服务器确认
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        os.makedirs(os.path.join(directory, 'bodies'), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(directory, 'index.sqlite'), timeout=30, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                encoding TEXT,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+        # fresh: 未过max_age直接使用；not_modified: 服务器返回304；stored: 新保存或更新的响应
+        self.counts = {'fresh': 0, 'not_modified': 0, 'stored': 0}
+
+    def lookup(self, url: str) -> Optional[HttpCacheEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path, size, headers, encoding, stored_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None or not os.path.exists(os.path.join(self.directory, row[0])):
+            return None
+        return HttpCacheEntry(url, row[0], row[1], json.loads(row[2]), row[3], row[4])
+
+    def is_fresh(self, entry: HttpCacheEntry) -> bool:
+        return self.max_age > 0 and time.time() - entry.stored_at < self.max_age
+
+    def body(self, entry: HttpCacheEntry) -> memoryview:
+        """
+        以内存映射方式读取响应体，返回的memoryview直接引用映射的页面，不复制数据
+        """
+        if entry.size == 0:
+            return memoryview(b'')
+        with open(os.path.join(self.directory, entry.path), 'rb') as f:
+            # 关闭文件描述符后映射仍然有效；文件被新版本替换时，旧映射继续指向旧内容
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with self._lock:
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), entry.url))
+            self._conn.commit()
+        return memoryview(mapped)
+
+    def response(self, entry: HttpCacheEntry, request: Optional[requests.PreparedRequest] = None) -> requests.Response:
+        """
+        用缓存的响应体构造一个200响应，调用方按正常响应使用即可
+
+        Args:
+            entry: 缓存条目
+            request: 触发本次读取的请求，304时为条件请求
+        """
+        response = requests.Response()
+        response.status_code = 200
+        response.url = entry.url
+        response.headers = CaseInsensitiveDict(entry.headers)
+        response.encoding = entry.encoding or 'utf-8'
+        # requests解码.text时用 str(content, encoding)，可直接作用于memoryview
+        response._content = self.body(entry)
+        response.request = request
+        response.from_cache = True
+        return response
+
+    def store(self, url: str, response: requests.Response) -> None:
+        """
+        保存带校验字段的200响应，没有ETag和Last-Modified的响应无法做条件请求，不保存
+        """
+        headers = {name: response.headers[name] for name in STORED_HEADERS if name in response.headers}
+        if response.status_code != 200 or not (headers.get('ETag') or headers.get('Last-Modified')):
+            return
+        if 'no-store' in headers.get('Cache-Control', ''):
+            return
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        path = os.path.join('bodies', key[:2], key)
+        full_path = os.path.join(self.directory, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        tmp_path = f"{full_path}.tmp.{os.getpid()}.{threading.get_ident()}"
+        content = response.content
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, full_path)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (url, path, size, headers, encoding, stored_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, path, len(content), json.dumps(headers), response.encoding, now, now)
+            )
+            self._evict()
+            self._conn.commit()
+        self.count('stored')
+
+    def touch(self, url: str, headers: CaseInsensitiveDict) -> None:
+        """304时更新缓存时间，服务器随304返回的新校验字段一并记录"""
+        with self._lock:
+            row = self._conn.execute("SELECT headers FROM responses WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return
+            stored = json.loads(row[0])
+            stored.update({
+                name: headers[name] for name in STORED_HEADERS if name in headers and name != 'Content-Type'
+            })
+            now = time.time()
+            self._conn.execute(
+                "UPDATE responses SET headers = ?, stored_at = ?, accessed_at = ? WHERE url = ?",
+                (json.dumps(stored), now, now, url)
+            )
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, path, size in self._conn.execute(
+            "SELECT url, path, size FROM responses ORDER BY accessed_at"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            try:
+                os.remove(os.path.join(self.directory, path))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self.counts[name] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counts)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
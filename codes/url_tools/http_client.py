@@ -0,0 +1,148 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, Optional
+from monitoring.metrics import Metrics
+from url_tools.http_cache import HttpCache
+import multiprocessing
+import threading
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int = 1):
+        """
+        线程安全的令牌桶限速器
+
+        Args:
+            rate: 每秒补充的令牌数，即长期平均请求速率
+            capacity: 桶容量，即允许的最大突发请求数
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """阻塞直到取得一个令牌"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def create_session(pool_size: int = 16, retries: int = 3) -> requests.Session:
+    """
+    创建带连接池和keep-alive的Session，对429/5xx按Retry-After退避重试
+
+    Args:
+        pool_size: 每个host的最大连接数
+        retries: 最大重试次数
+    """
+    session = requests.Session()
+    retry = Retry(
+        total=retries,
+        backoff_factor=1,
+        status_forcelist=(429, 500, 502, 503, 504),
+        respect_retry_after_header=True
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class SharedRateLimiter:
+    def __init__(self, rate: float):
+        """
+        跨进程共享的限速器：所有进程共用一个“下一次可以发请求的时间”，
+        需在创建进程池时通过initializer传给子进程
+
+        Args:
+            rate: 所有进程合计每秒允许的请求数
+        """
+        self.interval = 1 / rate
+        self._next = multiprocessing.Value('d', 0.0)
+
+    def acquire(self) -> None:
+        """阻塞直到轮到本次请求"""
+        with self._next.get_lock():
+            now = time.time()
+            start = max(now, self._next.value)
+            self._next.value = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class ArxivHttpClient:
+    def __init__(
+        self,
+        session: Optional[requests.Session] = None,
+        rate: float = 1.0,
+        burst: int = 1,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 30,
+        metrics: Optional[Metrics] = None,
+        name: str = 'arxiv',
+        limiter: Optional[TokenBucket] = None,
+        http_cache: Optional[HttpCache] = None
+    ):
+        """
+        共享Session的限速HTTP客户端，所有线程通过同一个令牌桶访问arXiv
+
+        Args:
+            session: 共享的requests.Session，为空时新建
+            rate: 每秒允许的请求数
+            burst: 允许的最大突发请求数
+            headers: 默认请求头
+            timeout: 单次请求超时（秒）
+            metrics: 可选的运行指标，记录限速等待、请求耗时、请求数和错误数
+            name: 指标名前缀，用于区分网页和export API
+            limiter: 自定义限速器（需提供acquire方法），如跨进程共享的限速器，为空时按rate和burst新建令牌桶
+            http_cache: 可选的响应缓存，有缓存时发送条件请求，304时从磁盘返回缓存的页面
+        """
+        self.session = session or create_session()
+        self.limiter = limiter or TokenBucket(rate, burst)
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.metrics = metrics or Metrics()
+        self.name = name
+        self.http_cache = http_cache
+
+    def get(self, url: str, params: Optional[Dict] = None) -> requests.Response:
+        # 带参数的请求（export API查询）每次内容都不同，不走缓存
+        entry = self.http_cache.lookup(url) if self.http_cache is not None and not params else None
+        if entry is not None and self.http_cache.is_fresh(entry):
+            self.http_cache.count('fresh')
+            self.metrics.incr(f"{self.name}_cache_fresh")
+            return self.http_cache.response(entry)
+        headers = {**self.headers, **entry.validators()} if entry is not None else self.headers
+        with self.metrics.timer(f"{self.name}_rate_wait_seconds"):
+            self.limiter.acquire()
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+        except requests.RequestException:
+            self.metrics.incr(f"{self.name}_errors")
+            raise
+        finally:
+            self.metrics.observe(f"{self.name}_request_seconds", time.perf_counter() - start)
+        self.metrics.incr(f"{self.name}_requests")
+        if entry is not None and response.status_code == 304:
+            self.http_cache.count('not_modified')
+            self.http_cache.touch(url, response.headers)
+            self.metrics.incr(f"{self.name}_not_modified")
+            self.metrics.incr(f"{self.name}_cached_bytes", entry.size)
+            return self.http_cache.response(entry, response.request)
+        if not response.ok:
+            self.metrics.incr(f"{self.name}_errors")
+        elif self.http_cache is not None and not params:
+            self.http_cache.store(url, response)
+        return response
@@ -0,0 +1,112 @@
+from typing import Any, Dict, Iterable, List, Optional
+import sys
+
+
+class CategoryIndex:
+    def __init__(self):
+        """
+        分类名到位序号的映射，论文的分类结果存为一个整数位掩码而不是字符串列表
+        """
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+
+    def mask(self, labels: Iterable[str]) -> int:
+        mask = 0
+        for label in labels:
+            if label not in self.ids:
+                self.ids[label] = len(self.names)
+                self.names.append(label)
+            mask |= 1 << self.ids[label]
+        return mask
+
+    def labels(self, mask: int) -> List[str]:
+        return [name for i, name in enumerate(self.names) if mask >> i & 1]
+
+
+CATEGORY_INDEX = CategoryIndex()
+
+
+class Paper:
+    """
+    一篇论文在抓取、处理和输出之间共享的紧凑记录：使用__slots__避免每个实例一个字典，
+    重复出现的主题、日期字符串驻留为同一对象，译文和分类结果直接写在同一记录上。
+    保留按键访问（paper['id']、paper.get('abstract')），与原先的字典格式兼容
+    """
+
+    # 抓取得到的字段，也是写入缓存和检查点日志的字段
+    FIELDS = ('id', 'title', 'authors', 'abstract', 'primary_subject', 'subjects', 'pdf_url', 'arxiv_url', 'date')
+
+    __slots__ = FIELDS + ('title_zh', 'abstract_zh', 'category_mask')
+
+    def __init__(
+        self,
+        id: str,
+        title: str,
+        authors: Iterable[str] = (),
+        abstract: Optional[str] = None,
+        primary_subject: str = 'N/A',
+        subjects: str = 'N/A',
+        pdf_url: str = '',
+        arxiv_url: str = '',
+        date: str = ''
+    ):
+        self.id = id
+        self.title = title
+        self.authors = tuple(authors)
+        self.abstract = abstract
+        self.primary_subject = sys.intern(primary_subject)
+        self.subjects = sys.intern(subjects)
+        self.pdf_url = pdf_url
+        self.arxiv_url = arxiv_url
+        self.date = sys.intern(date)
+        self.title_zh: Optional[str] = None
+        self.abstract_zh: Optional[str] = None
+        self.category_mask = 0
+
+    @property
+    def url(self) -> str:
+        return self.arxiv_url
+
+    @property
+    def categories(self) -> List[str]:
+        return CATEGORY_INDEX.labels(self.category_mask)
+
+    @categories.setter
+    def categories(self, labels: Iterable[str]) -> None:
+        self.category_mask = CATEGORY_INDEX.mask(labels)
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        setattr(self, key, value)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {field: getattr(self, field) for field in self.FIELDS}
+        data['authors'] = list(self.authors)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Paper':
+        return cls(**{field: data[field] for field in cls.FIELDS if data.get(field) is not None})
+
+    def __repr__(self) -> str:
+        return f"Paper({self.id!r}, {self.title!r})"
+
+
+def as_paper(data: Any) -> Paper:
+    """检查点日志和缓存中读回的是字典，转换为Paper；已是Paper的原样返回"""
+    return data if isinstance(data, Paper) else Paper.from_dict(data)
+
+
+def to_json(obj: Any) -> Dict[str, Any]:
+    """json.dumps的default参数：Paper按to_dict序列化"""
+    if isinstance(obj, Paper):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
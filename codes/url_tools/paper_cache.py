@@ -0,0 +1,109 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List
+from url_tools.arxiv_abstracts import VERSION_PATTERN, strip_version
+from url_tools.paper import to_json
+
+
+class PaperCache:
+    def __init__(self, path: str, ttl_days: float = 30, max_entries: int = 100000):
+        """
+        基于SQLite的论文元数据缓存，按arXiv ID和版本号存储
+
+        Args:
+            path: SQLite数据库文件路径
+            ttl_days: 缓存有效期（天），过期条目视为未命中并在写入时清理
+            max_entries: 最多保留的条目数，超出时按最近访问时间淘汰
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.ttl_seconds = ttl_days * 24 * 3600
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS papers (
+                paper_id TEXT NOT NULL,
+                version TEXT NOT NULL,
+                data TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (paper_id, version)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_papers_accessed ON papers (accessed_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def _split_id(paper_id: str):
+        match = VERSION_PATTERN.search(paper_id)
+        return strip_version(paper_id), match.group(0) if match else ''
+
+    def get_many(self, paper_ids: Iterable[str]) -> Dict[str, Dict]:
+        """
+        批量查询缓存
+
+        Args:
+            paper_ids: arXiv论文ID列表（可带版本号）
+
+        Returns:
+            命中的论文ID到论文信息字典的映射
+        """
+        now = time.time()
+        found = {}
+        with self._lock:
+            for paper_id in paper_ids:
+                base_id, version = self._split_id(paper_id)
+                row = self._conn.execute(
+                    "SELECT data FROM papers WHERE paper_id = ? AND version = ? AND updated_at >= ?",
+                    (base_id, version, now - self.ttl_seconds)
+                ).fetchone()
+                if row:
+                    found[paper_id] = json.loads(row[0])
+            if found:
+                self._conn.executemany(
+                    "UPDATE papers SET accessed_at = ? WHERE paper_id = ? AND version = ?",
+                    [(now, *self._split_id(paper_id)) for paper_id in found]
+                )
+                self._conn.commit()
+        return found
+
+    def put_many(self, papers: List[Dict]) -> None:
+        """
+        写入论文信息并执行过期与容量淘汰
+
+        Args:
+            papers: get_latest_papers返回的Paper列表（也接受字典）
+        """
+        now = time.time()
+        rows = [
+            (*self._split_id(paper['id']), json.dumps(paper, ensure_ascii=False, default=to_json), now, now)
+            for paper in papers if paper.get('abstract') and paper['abstract'] != 'N/A'
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO papers (paper_id, version, data, updated_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute("DELETE FROM papers WHERE updated_at < ?", (now - self.ttl_seconds,))
+        self._conn.execute("""
+            DELETE FROM papers WHERE rowid IN (
+                SELECT rowid FROM papers ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_entries,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,224 @@
+from bs4 import BeautifulSoup
+from typing import Dict, List, Optional
+import html
+import re
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+META_ABSTRACT_PATTERN = re.compile(
+    r'<meta\s+name="citation_abstract"\s+content="([^"]*)"', re.IGNORECASE
+)
+
+
+def _class_xpath(tag: str, class_name: str) -> str:
+    return f".//{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')]"
+
+
+class BeautifulSoupParser:
+    """基于BeautifulSoup html.parser的解析器，不依赖额外的C扩展"""
+
+    name = 'bs4'
+
+    def parse_listing(self, text: str, base_url: str, max_results: Optional[int] = None) -> List[Dict]:
+        """
+        解析分类列表页
+
+        Args:
+            text: 列表页HTML
+            base_url: arXiv网站地址，用于拼接PDF链接
+            max_results: 最大返回结果数量
+
+        Returns:
+            论文信息字典列表，包含id、title、authors、primary_subject、subjects、pdf_url
+        """
+        soup = BeautifulSoup(text, 'html.parser')
+
+        # 找到论文列表区域
+        dlpage = soup.find('div', {'id': 'dlpage'})
+        if not dlpage:
+            print("Cannot find paper list section")
+            return []
+
+        papers = []
+        # 查找所有论文条目
+        articles = soup.find('dl', {'id': 'articles'})
+        if not articles:
+            return []
+
+        for dt, dd in zip(articles.find_all('dt'), articles.find_all('dd')):
+            if max_results and len(papers) >= max_results:
+                break
+
+            try:
+                # 获取论文ID和链接
+                paper_link = dt.find('a', {'title': 'Abstract'})
+                if not paper_link:
+                    continue
+                paper_id = paper_link.text.strip().replace('arXiv:', '')
+
+                # 获取PDF链接
+                pdf_link = dt.find('a', {'title': 'Download PDF'})
+                pdf_url = f"{base_url}{pdf_link['href']}" if pdf_link else None
+
+                # 解析论文元数据
+                meta = dd.find('div', {'class': 'meta'})
+                if not meta:
+                    continue
+
+                # 获取标题
+                title_div = meta.find('div', {'class': 'list-title'})
+                title = title_div.text.replace('Title:', '').strip() if title_div else 'N/A'
+
+                # 获取作者列表
+                authors_div = meta.find('div', {'class': 'list-authors'})
+                author_list = []
+                if authors_div:
+                    author_links = authors_div.find_all('a')
+                    author_list = [a.text.strip() for a in author_links]
+
+                # 获取主题分类
+                subjects_div = meta.find('div', {'class': 'list-subjects'})
+                if subjects_div:
+                    primary_subject = subjects_div.find('span', {'class': 'primary-subject'})
+                    primary_subject = primary_subject.text.strip() if primary_subject else 'N/A'
+                    subjects = subjects_div.text.replace('Subjects:', '').strip()
+                else:
+                    primary_subject = 'N/A'
+                    subjects = 'N/A'
+
+                papers.append({
+                    'id': paper_id,
+                    'title': title,
+                    'authors': author_list,
+                    'primary_subject': primary_subject,
+                    'subjects': subjects,
+                    'pdf_url': pdf_url
+                })
+
+            except Exception as e:
+                print(f"Error parsing paper: {e}")
+                continue
+
+        return papers
+
+    def parse_abstract(self, text: str) -> Optional[str]:
+        """
+        从论文详情页中提取摘要
+
+        Args:
+            text: 详情页HTML
+
+        Returns:
+            摘要文本，找不到时返回None
+        """
+        soup = BeautifulSoup(text, 'html.parser')
+
+        # 在meta标签中查找摘要
+        meta_abstract = soup.find('meta', {'name': 'citation_abstract'})
+        if meta_abstract and meta_abstract.get('content'):
+            return meta_abstract['content'].strip()
+
+        # 备选方案：在页面内容中查找摘要
+        abstract_div = soup.find('blockquote', {'class': 'abstract'})
+        if abstract_div:
+            return abstract_div.text.replace('Abstract:', '').strip()
+
+        return None
+
+
+class LxmlParser(BeautifulSoupParser):
+    """基于lxml的解析器，输出与BeautifulSoupParser相同的字典"""
+
+    name = 'lxml'
+
+    def parse_listing(self, text: str, base_url: str, max_results: Optional[int] = None) -> List[Dict]:
+        root = lxml.html.fromstring(text)
+        if not root.xpath(".//div[@id='dlpage']"):
+            print("Cannot find paper list section")
+            return []
+
+        articles = root.xpath(".//dl[@id='articles']")
+        if not articles:
+            return []
+
+        papers = []
+        for dt, dd in zip(articles[0].iterdescendants('dt'), articles[0].iterdescendants('dd')):
+            if max_results and len(papers) >= max_results:
+                break
+
+            try:
+                paper_link = dt.xpath(".//a[@title='Abstract']")
+                if not paper_link:
+                    continue
+                paper_id = paper_link[0].text_content().strip().replace('arXiv:', '')
+
+                pdf_link = dt.xpath(".//a[@title='Download PDF']/@href")
+                pdf_url = f"{base_url}{pdf_link[0]}" if pdf_link else None
+
+                meta = dd.xpath(_class_xpath('div', 'meta'))
+                if not meta:
+                    continue
+                meta = meta[0]
+
+                title_div = meta.xpath(_class_xpath('div', 'list-title'))
+                title = title_div[0].text_content().replace('Title:', '').strip() if title_div else 'N/A'
+
+                authors_div = meta.xpath(_class_xpath('div', 'list-authors'))
+                author_list = []
+                if authors_div:
+                    author_list = [a.text_content().strip() for a in authors_div[0].iterdescendants('a')]
+
+                subjects_div = meta.xpath(_class_xpath('div', 'list-subjects'))
+                if subjects_div:
+                    primary_subject = subjects_div[0].xpath(_class_xpath('span', 'primary-subject'))
+                    primary_subject = primary_subject[0].text_content().strip() if primary_subject else 'N/A'
+                    subjects = subjects_div[0].text_content().replace('Subjects:', '').strip()
+                else:
+                    primary_subject = 'N/A'
+                    subjects = 'N/A'
+
+                papers.append({
+                    'id': paper_id,
+                    'title': title,
+                    'authors': author_list,
+                    'primary_subject': primary_subject,
+                    'subjects': subjects,
+                    'pdf_url': pdf_url
+                })
+
+            except Exception as e:
+                print(f"Error parsing paper: {e}")
+                continue
+
+        return papers
+
+    def parse_abstract(self, text: str) -> Optional[str]:
+        # 详情页只需要一个meta标签，先用正则直接定位，避免构建整棵DOM树
+        match = META_ABSTRACT_PATTERN.search(text)
+        if match and match.group(1).strip():
+            return html.unescape(match.group(1)).strip()
+        return super().parse_abstract(text)
+
+
+PARSERS = {
+    BeautifulSoupParser.name: BeautifulSoupParser,
+    LxmlParser.name: LxmlParser
+}
+
+
+def get_parser(name: Optional[str] = None) -> BeautifulSoupParser:
+    """
+    获取解析器实例，未指定时优先使用lxml，未安装lxml时退回BeautifulSoup
+
+    Args:
+        name: 解析器名称，'lxml' 或 'bs4'
+    """
+    if name is None:
+        name = LxmlParser.name if lxml is not None else BeautifulSoupParser.name
+    if name == LxmlParser.name and lxml is None:
+        print("lxml is not installed, falling back to BeautifulSoup parser")
+        name = BeautifulSoupParser.name
+    return PARSERS[name]()